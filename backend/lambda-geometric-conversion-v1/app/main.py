@@ -117,7 +117,9 @@ async def convert_to_rooms(request: GeometricConversionRequest):
             blank = np.ones((height, width, 3), dtype=np.uint8) * 255
 
             # Draw rooms
-            vis_image = draw_rooms_on_image(blank, [Room(**r) for r in rooms])
+            vis_image = draw_rooms_on_image(
+                blank, [Room(**r) for r in rooms], inplace=True
+            )
             visualization = encode_image_to_base64(vis_image)
         
         # Calculate total time
@@ -3,10 +3,40 @@ Geometric algorithm for wall-to-room conversion
 """
 import cv2
 import numpy as np
+from functools import lru_cache
 from typing import List, Tuple, Dict, Any
 from .models import Wall, Room, BoundingBox
 
 
+@lru_cache(maxsize=4096)
+def _clip_bbox(
+    bbox: Tuple[int, int, int, int],
+    height: int,
+    width: int
+) -> Tuple[int, int, int, int]:
+    """
+    Clamp a wall bounding box to grid bounds
+    
+    Memoized: warm Lambda invocations see the same walls and image
+    dimensions repeatedly.
+    
+    Args:
+        bbox: (x1, y1, x2, y2) in pixels
+        height: Grid height
+        width: Grid width
+        
+    Returns:
+        Clamped (x1, y1, x2, y2)
+    """
+    x1, y1, x2, y2 = bbox
+    return (
+        max(0, min(x1, width - 1)),
+        max(0, min(y1, height - 1)),
+        max(0, min(x2, width - 1)),
+        max(0, min(y2, height - 1)),
+    )
+
+
 class GeometricRoomDetector:
     """Converts wall detections to room polygons using geometric analysis"""
     
@@ -76,15 +106,10 @@ class GeometricRoomDetector:
     
     def _draw_walls(self, grid: np.ndarray, walls: List[Wall]) -> np.ndarray:
         """Draw walls on grid"""
+        h, w = grid.shape
         for wall in walls:
-            x1, y1, x2, y2 = wall.bounding_box
-            
             # Ensure coordinates are within bounds
-            h, w = grid.shape
-            x1 = max(0, min(x1, w - 1))
-            x2 = max(0, min(x2, w - 1))
-            y1 = max(0, min(y1, h - 1))
-            y2 = max(0, min(y2, h - 1))
+            x1, y1, x2, y2 = _clip_bbox(wall.bounding_box, h, w)
             
             # Draw filled rectangle
             cv2.rectangle(grid, (x1, y1), (x2, y2), 255, -1)
@@ -134,12 +159,14 @@ class GeometricRoomDetector:
             if area < self.min_room_area or area > max_area:
                 continue
             
-            # Get polygon
-            mask = (labels == label).astype(np.uint8) * 255
+            # Get polygon from the component's bounding box only,
+            # instead of comparing the whole label image per room
+            mask = (labels[y:y + h, x:x + w] == label).astype(np.uint8) * 255
             contours, _ = cv2.findContours(
                 mask, 
                 cv2.RETR_EXTERNAL, 
-                cv2.CHAIN_APPROX_SIMPLE
+                cv2.CHAIN_APPROX_SIMPLE,
+                offset=(int(x), int(y))
             )
             
             if not contours:
@@ -4,6 +4,7 @@ FastAPI application for room boundary detection
 import time
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from mangum import Mangum
 from .models import (
     RoomDetectionRequest, 
@@ -17,7 +18,10 @@ from .visualization import RoomVisualizer
 app = FastAPI(
     title="Room Boundary Detection API",
     description="Converts wall detections to room boundary polygons",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson encodes the large base64 visualization payloads much faster
+    # than stdlib json and writes bytes directly
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -2,11 +2,13 @@
 Pydantic models for request/response validation
 """
 from typing import List, Tuple, Optional, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Wall(BaseModel):
     """Wall detection result"""
+    model_config = ConfigDict(frozen=True)
+    
     id: str
     bounding_box: Tuple[int, int, int, int] = Field(
         ..., 
@@ -42,6 +44,8 @@ class RoomDetectionRequest(BaseModel):
 
 class BoundingBox(BaseModel):
     """Room bounding box"""
+    model_config = ConfigDict(frozen=True)
+    
     x_min: int
     y_min: int
     x_max: int
@@ -50,6 +54,8 @@ class BoundingBox(BaseModel):
 
 class Room(BaseModel):
     """Detected room with boundaries"""
+    model_config = ConfigDict(frozen=True)
+    
     id: str
     polygon_vertices: List[Tuple[int, int]] = Field(
         ..., 
@@ -65,6 +71,8 @@ class Room(BaseModel):
 
 class RoomDetectionResponse(BaseModel):
     """Response with detected rooms"""
+    model_config = ConfigDict(frozen=True)
+    
     success: bool
     rooms: List[Room]
     visualization: Optional[str] = Field(None, description="Base64 encoded image")
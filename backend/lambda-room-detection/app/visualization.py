@@ -25,6 +25,16 @@ class RoomVisualizer:
         (128, 255, 0),    # Chartreuse
     ]
     
+    # Dtypes PNG encodes as-is vs. dtypes cv2.minMaxLoc can range-check
+    _UNCHECKED_DTYPES = (np.dtype(np.uint8), np.dtype(np.uint16))
+    _RANGE_CHECKED_DTYPES = (
+        np.dtype(np.int8),
+        np.dtype(np.int16),
+        np.dtype(np.int32),
+        np.dtype(np.float32),
+        np.dtype(np.float64),
+    )
+    
     def __init__(self, font_scale: float = 0.5, line_thickness: int = 2):
         """
         Args:
@@ -142,6 +152,33 @@ class RoomVisualizer:
             2
         )
     
+    def _validate(self, image: np.ndarray) -> None:
+        """
+        Ensure image pixel values can be encoded as PNG
+
+        Unsigned integer images (uint8 canvases from create_visualization,
+        or 16-bit PNG data) are valid by construction and skip the scan.
+        Signed and float images get a single min/max pass over the buffer.
+
+        Args:
+            image: OpenCV image (numpy array)
+
+        Raises:
+            ValueError: If the dtype is unsupported or pixel values
+                fall outside [0, 255]
+        """
+        if image.dtype in self._UNCHECKED_DTYPES:
+            return
+
+        if image.dtype not in self._RANGE_CHECKED_DTYPES:
+            raise ValueError(f"Unsupported image dtype: {image.dtype}")
+
+        lo, hi, _, _ = cv2.minMaxLoc(image.reshape(-1, 1))
+        if lo < 0 or hi > 255:
+            raise ValueError(
+                f"Image values out of range: [{lo}, {hi}] (expected [0, 255])"
+            )
+
     def encode_base64(self, image: np.ndarray) -> str:
         """
         Encode image to base64 string
@@ -152,6 +189,8 @@ class RoomVisualizer:
         Returns:
             Base64 encoded string
         """
+        self._validate(image)
+
         # Encode to PNG
         success, buffer = cv2.imencode('.png', image)
         
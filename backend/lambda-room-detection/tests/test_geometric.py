@@ -3,7 +3,7 @@ Unit tests for geometric room detection algorithm
 """
 import pytest
 import numpy as np
-from app.geometric import GeometricRoomDetector
+from app.geometric import GeometricRoomDetector, _clip_bbox
 from app.models import Wall, Room
 
 
@@ -19,6 +19,11 @@ class TestGeometricRoomDetector:
         assert grid.dtype == np.uint8
         assert np.all(grid == 0)
     
+    def test_clip_bbox_clamps_to_grid(self):
+        """Test wall boxes are clamped to [0, size - 1] on both axes"""
+        assert _clip_bbox((-10, -5, 150, 250), 200, 100) == (0, 0, 99, 199)
+        assert _clip_bbox((10, 20, 30, 40), 200, 100) == (10, 20, 30, 40)
+    
     def test_draw_walls(self):
         """Test wall drawing on grid"""
         detector = GeometricRoomDetector()
@@ -193,3 +193,34 @@ class TestIntegrationPipeline:
         assert processing_time < 1.0, f"Processing took {processing_time:.2f}s, expected <1s"
         assert len(rooms) >= 1
 
+    
+    def test_api_response_serialized_with_orjson(self):
+        """Test /api/detect-rooms round-trips through ORJSONResponse"""
+        import base64
+        from fastapi.responses import ORJSONResponse
+        from fastapi.testclient import TestClient
+        from app.main import app
+        
+        assert app.router.default_response_class is ORJSONResponse
+        
+        client = TestClient(app)
+        request_data = {
+            "walls": [
+                {"id": "wall_001", "bounding_box": [50, 0, 55, 100], "confidence": 0.85},
+                {"id": "wall_002", "bounding_box": [0, 50, 100, 55], "confidence": 0.80},
+            ],
+            "image_dimensions": [100, 100],
+            "min_room_area": 100,
+            "return_visualization": True
+        }
+        
+        response = client.post("/api/detect-rooms", json=request_data)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert data["success"]
+        assert data["total_rooms"] == len(data["rooms"])
+        # Visualization survives serialization as a decodable base64 string
+        assert isinstance(data["visualization"], str)
+        assert len(base64.b64decode(data["visualization"])) > 0
@@ -160,3 +160,30 @@ class TestRoomDetectionResponse:
         assert response.total_rooms == 1
         assert response.visualization == "base64_string"
 
+
+
+class TestImmutability:
+    """Test detection results are frozen after validation"""
+    
+    def test_room_is_frozen(self):
+        """Test room fields cannot be reassigned"""
+        room = Room(
+            id="room_001",
+            polygon_vertices=[(0, 0), (100, 0), (100, 100), (0, 100)],
+            bounding_box=BoundingBox(x_min=0, y_min=0, x_max=100, y_max=100),
+            area_pixels=10000,
+            centroid=(50, 50),
+            confidence=0.9,
+            shape_type="rectangle",
+            num_vertices=4
+        )
+        
+        with pytest.raises(ValidationError):
+            room.confidence = 0.5
+    
+    def test_wall_is_frozen(self):
+        """Test wall fields cannot be reassigned"""
+        wall = Wall(id="wall_001", bounding_box=(10, 20, 30, 40), confidence=0.85)
+        
+        with pytest.raises(ValidationError):
+            wall.bounding_box = (0, 0, 1, 1)
@@ -57,6 +57,55 @@ class TestRoomVisualizer:
         # Base64 strings are alphanumeric with +, /, = characters
         assert all(c.isalnum() or c in '+/=' for c in encoded)
     
+    def test_encode_base64_rejects_out_of_range_values(self):
+        """Test encoding rejects non-uint8 images outside the 8-bit range"""
+        visualizer = RoomVisualizer()
+        
+        image = np.full((100, 100, 3), 300.0, dtype=np.float32)
+        
+        with pytest.raises(ValueError):
+            visualizer.encode_base64(image)
+    
+    def test_encode_base64_rejects_negative_values(self):
+        """Test encoding rejects images with negative pixel values"""
+        visualizer = RoomVisualizer()
+        
+        image = np.full((100, 100, 3), -1, dtype=np.int16)
+        
+        with pytest.raises(ValueError):
+            visualizer.encode_base64(image)
+    
+    def test_encode_base64_accepts_in_range_float_image(self):
+        """Test encoding accepts non-uint8 images within the 8-bit range"""
+        visualizer = RoomVisualizer()
+        
+        image = np.full((100, 100, 3), 100.0, dtype=np.float32)
+        
+        encoded = visualizer.encode_base64(image)
+        
+        assert isinstance(encoded, str)
+        assert len(encoded) > 0
+    
+    def test_encode_base64_accepts_16bit_image(self):
+        """Test encoding passes uint16 images through as 16-bit PNG"""
+        visualizer = RoomVisualizer()
+        
+        image = np.full((100, 100, 3), 40000, dtype=np.uint16)
+        
+        encoded = visualizer.encode_base64(image)
+        
+        assert isinstance(encoded, str)
+    
+    @pytest.mark.parametrize("dtype", [np.float16, np.bool_])
+    def test_encode_base64_rejects_unsupported_dtype(self, dtype):
+        """Test encoding raises ValueError for dtypes it cannot check"""
+        visualizer = RoomVisualizer()
+        
+        image = np.zeros((100, 100, 3), dtype=dtype)
+        
+        with pytest.raises(ValueError):
+            visualizer.encode_base64(image)
+    
     def test_visualization_with_empty_rooms(self):
         """Test visualization with no rooms"""
         visualizer = RoomVisualizer()
@@ -4,11 +4,39 @@ Loads the wall detection model and performs inference.
 """
 import time
 import numpy as np
+import torch
+import torch.nn.functional as F
 from ultralytics import YOLO
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import os
 import boto3
 import tarfile
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+
+# S3 client reused across model downloads (created on first use so
+# containers that ship the model locally never pay for it)
+_s3_client = None
+
+# Prefer the CRT transfer client: parallel ranged GETs for the model
+# tarball. boto3 falls back to the classic manager if awscrt is missing.
+_MODEL_TRANSFER_CONFIG = TransferConfig(preferred_transfer_client='crt')
+
+
+def _get_s3_client():
+    """Get or create the module-level S3 client"""
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client(
+            's3',
+            config=Config(
+                tcp_keepalive=True,
+                max_pool_connections=10,
+                retries={'mode': 'standard'}
+            )
+        )
+    return _s3_client
 
 
 class WallDetector:
@@ -17,6 +45,18 @@ class WallDetector:
     Detects wall segments in architectural blueprints.
     """
     
+    # Long-side input size for GPU letterboxing (ultralytics default imgsz)
+    INFERENCE_SIZE = 640
+    # Letterbox output is padded to a multiple of the model stride
+    LETTERBOX_STRIDE = 32
+    # Ultralytics letterbox pad value (gray 114), normalized
+    LETTERBOX_FILL = 114 / 255.0
+    # ONNX exports tried per WALL_MODEL_FORMAT, in order, before the .pt
+    ONNX_SUFFIXES = {
+        'onnx': ('.onnx',),
+        'onnx-int8': ('.int8.onnx', '.onnx'),
+    }
+    
     def __init__(
         self,
         model_path: str = "/app/models/best_wall_model.pt",
@@ -32,6 +72,10 @@ class WallDetector:
         self.model_path = model_path
         self.confidence_threshold = confidence_threshold
         self.model = None
+        self.model_format = None
+        # GPU letterbox buffers, keyed by padded (height, width). Callers
+        # serialize detect() (see app.main), so one set is shared.
+        self._letterbox_buffers = {}
         self._load_model()
     
     def _load_model(self):
@@ -48,10 +92,66 @@ class WallDetector:
                 print("ERROR: Cannot proceed without trained model")
                 raise FileNotFoundError(f"Model not found at {self.model_path} and S3 download failed: {e}")
 
-        print(f"Loading wall detection model from {self.model_path}")
-        self.model = YOLO(self.model_path)
+        weights_path = self._select_weights()
+        print(f"Loading wall detection model from {weights_path}")
+        if weights_path.endswith('.onnx'):
+            # Exported models don't carry a task ultralytics can infer
+            self.model = YOLO(weights_path, task='detect')
+            self.model_format = 'onnx'
+        else:
+            self.model = YOLO(weights_path)
+            self.model_format = 'pt'
         print("Model loaded successfully")
 
+        if os.environ.get('WARMUP', '1') == '1':
+            self._warmup()
+
+    def _select_weights(self) -> str:
+        """
+        Pick the weights file to load.
+        
+        With WALL_MODEL_FORMAT=onnx, an ONNX export next to the .pt weights
+        (same name, .onnx suffix; see export_onnx.py) is run through
+        onnxruntime instead of eager PyTorch; onnx-int8 prefers the
+        dynamically quantized .int8.onnx export. CPU only: the GPU path
+        feeds variable-size letterboxed tensors that a fixed-size export
+        can't take. Falls back to FP32 ONNX, then to the .pt weights, if
+        an export is missing.
+        
+        Returns:
+            Path of the weights file to load
+        """
+        model_format = os.environ.get('WALL_MODEL_FORMAT', 'pt')
+        if model_format not in self.ONNX_SUFFIXES:
+            return self.model_path
+        if torch.cuda.is_available():
+            print(f"CUDA available, ignoring WALL_MODEL_FORMAT={model_format}")
+            return self.model_path
+        
+        stem = os.path.splitext(self.model_path)[0]
+        for suffix in self.ONNX_SUFFIXES[model_format]:
+            if os.path.exists(stem + suffix):
+                return stem + suffix
+            print(f"ONNX model not found at {stem + suffix}")
+        print(f"Using {self.model_path}")
+        return self.model_path
+
+    def _warmup(self):
+        """
+        Run one dummy inference so the first real request doesn't pay
+        for one-time setup (predictor construction, device init, lazy
+        kernel compilation). Failures are logged, never raised.
+        """
+        size = self.INFERENCE_SIZE
+        try:
+            self.model.predict(
+                np.zeros((size, size, 3), dtype=np.uint8),
+                verbose=False
+            )
+            print("Model warmed up")
+        except Exception as e:
+            print(f"Model warmup failed (continuing): {e}")
+
     def _download_model_from_s3(self):
         """Download trained WALL detection model from S3 (SageMaker training output)"""
         s3_bucket = os.environ.get('MODEL_S3_BUCKET', 'sagemaker-us-east-1-971422717446')
@@ -60,13 +160,18 @@ class WallDetector:
         print(f"  S3 Bucket: {s3_bucket}")
         print(f"  S3 Key: {s3_key}")
 
-        s3_client = boto3.client('s3')
+        s3_client = _get_s3_client()
         tar_path = "/tmp/model.tar.gz"
         model_path = "/tmp/final_model.pt"
 
         # Download tar.gz from S3
         print(f"  Downloading from s3://{s3_bucket}/{s3_key}")
-        s3_client.download_file(s3_bucket, s3_key, tar_path)
+        s3_client.download_file(
+            s3_bucket,
+            s3_key,
+            tar_path,
+            Config=_MODEL_TRANSFER_CONFIG
+        )
         print(f"  ✓ Downloaded to {tar_path}")
 
         # Extract final_model.pt from tar.gz
@@ -81,10 +186,71 @@ class WallDetector:
         else:
             raise FileNotFoundError("final_model.pt not found in tar.gz archive")
     
+    def _letterbox_buffer(self, height: int, width: int) -> torch.Tensor:
+        """
+        Get the reusable (1, 3, height, width) CUDA input tensor.
+        
+        Letterboxed shapes are multiples of the stride with a 640 long
+        side, so only a handful of buffers ever exist.
+        """
+        buffer = self._letterbox_buffers.get((height, width))
+        if buffer is None:
+            buffer = torch.empty((1, 3, height, width), device='cuda')
+            self._letterbox_buffers[(height, width)] = buffer
+        return buffer
+    
+    def _preprocess_on_gpu(
+        self,
+        image: np.ndarray
+    ) -> Tuple[torch.Tensor, float, Tuple[int, int]]:
+        """
+        Build the model input tensor on the GPU instead of in NumPy.
+        
+        Uploads the raw uint8 image once, then does BGR->RGB, HWC->CHW,
+        normalization and a letterbox resize on the device. Like the
+        ultralytics CPU pipeline, the long side is scaled to
+        INFERENCE_SIZE (keeping aspect ratio) and the result is padded
+        to a multiple of the model stride. The resized image is written
+        into a reused per-shape buffer instead of a freshly padded copy.
+        
+        Args:
+            image: OpenCV image (BGR format)
+            
+        Returns:
+            Tuple of (input_tensor, gain, (pad_x, pad_y))
+            Boxes map back to image pixels as (coord - pad) / gain
+        """
+        height, width = image.shape[:2]
+        gain = self.INFERENCE_SIZE / max(height, width)
+        new_h = int(round(height * gain))
+        new_w = int(round(width * gain))
+        
+        tensor = torch.as_tensor(image, device='cuda')
+        tensor = tensor[..., [2, 1, 0]].permute(2, 0, 1).unsqueeze(0)
+        tensor = tensor.float().div_(255.0)
+        resized = F.interpolate(
+            tensor,
+            size=(new_h, new_w),
+            mode='bilinear',
+            align_corners=False
+        )
+        
+        # Pad evenly on both sides up to the next stride multiple
+        pad_h = -new_h % self.LETTERBOX_STRIDE
+        pad_w = -new_w % self.LETTERBOX_STRIDE
+        pad_top = pad_h // 2
+        pad_left = pad_w // 2
+        letterboxed = self._letterbox_buffer(new_h + pad_h, new_w + pad_w)
+        letterboxed.fill_(self.LETTERBOX_FILL)
+        letterboxed[:, :, pad_top:pad_top + new_h, pad_left:pad_left + new_w] = resized
+        
+        return letterboxed, gain, (pad_left, pad_top)
+    
     def detect(
         self,
         image: np.ndarray,
-        confidence_threshold: float = None
+        confidence_threshold: float = None,
+        output_size: Optional[Tuple[int, int]] = None
     ) -> Tuple[List[dict], float]:
         """
         Detect walls in image.
@@ -92,6 +258,8 @@ class WallDetector:
         Args:
             image: OpenCV image (BGR format)
             confidence_threshold: Override default confidence threshold
+            output_size: (width, height) of the original image when image
+                was decoded at reduced resolution; boxes are scaled to it
             
         Returns:
             Tuple of (wall_list, inference_time_ms)
@@ -102,25 +270,49 @@ class WallDetector:
         # Use instance threshold if not overridden
         threshold = confidence_threshold or self.confidence_threshold
         
+        # Preprocess on the GPU when available, otherwise let YOLO
+        # run its default CPU pipeline on the NumPy image
+        if torch.cuda.is_available():
+            source, gain, (pad_x, pad_y) = self._preprocess_on_gpu(image)
+        else:
+            source, gain, (pad_x, pad_y) = image, 1.0, (0, 0)
+        
         # Run inference
         results = self.model(
-            image,
+            source,
             conf=threshold,
             verbose=False
         )
         
-        # Extract detections
-        walls = []
-        for i, detection in enumerate(results[0].boxes):
-            # Get bounding box coordinates
-            x1, y1, x2, y2 = detection.xyxy[0].tolist()
-            confidence = float(detection.conf[0])
-            
-            walls.append({
+        # Pull all boxes off the device at once, map them back to image
+        # pixels and clamp to the image bounds without per-box branches
+        boxes = results[0].boxes
+        xyxy = boxes.xyxy.cpu().numpy().reshape(-1, 4)
+        confidences = boxes.conf.cpu().numpy()
+        
+        height, width = image.shape[:2]
+        xyxy = (xyxy - (pad_x, pad_y, pad_x, pad_y)) / gain
+        if output_size is not None:
+            scale_x = output_size[0] / width
+            scale_y = output_size[1] / height
+            xyxy *= (scale_x, scale_y, scale_x, scale_y)
+            width, height = output_size
+        np.clip(xyxy[:, 0::2], 0, width, out=xyxy[:, 0::2])
+        np.clip(xyxy[:, 1::2], 0, height, out=xyxy[:, 1::2])
+        xyxy = xyxy.astype(np.int32)
+        
+        # Extract detections; tolist() converts every row to Python ints
+        # and floats in one C call instead of per-element int()/float()
+        walls = [
+            {
                 "id": f"wall_{i+1:03d}",
-                "bounding_box": [int(x1), int(y1), int(x2), int(y2)],
+                "bounding_box": box,
                 "confidence": confidence
-            })
+            }
+            for i, (box, confidence) in enumerate(
+                zip(xyxy.tolist(), confidences.tolist())
+            )
+        ]
         
         inference_time = (time.time() - start_time) * 1000
         
@@ -131,6 +323,7 @@ class WallDetector:
         return {
             "model_path": self.model_path,
             "confidence_threshold": self.confidence_threshold,
+            "model_format": self.model_format,
             "model_loaded": self.model is not None
         }
 
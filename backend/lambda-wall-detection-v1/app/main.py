@@ -2,33 +2,61 @@
 FastAPI application for wall detection.
 This is the entry point for the Lambda function.
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from mangum import Mangum
+import numpy as np
+import orjson
+import asyncio
+import logging
+import threading
 import time
 import sys
 import os
-
-# Add shared module to path
-# Support both Docker (/app/shared) and local development (../shared)
-if os.path.exists('/app/shared'):
-    # Docker environment
-    sys.path.insert(0, '/app')
-else:
-    # Local development - add backend directory so 'shared' can be imported
+from typing import Optional
+
+# The image puts the task root (containing shared/) on PYTHONPATH, so
+# the Lambda never touches sys.path. Local development falls back to
+# adding the backend directory so 'shared' can be imported.
+try:
+    import shared  # noqa: F401
+except ImportError:
     _backend_path = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
     sys.path.insert(0, os.path.abspath(_backend_path))
 
 from shared.models import WallDetectionRequest, WallDetectionResponse, ErrorResponse
-from shared.image_utils import decode_base64_image, validate_image_dimensions
+from shared.image_utils import (
+    MAX_ENCODED_BYTES,
+    decode_base64_bytes,
+    decode_image_bytes_reduced,
+    read_image_size,
+    validate_image_size
+)
 from app.detection import WallDetector
 
+# Mangum drives each invocation on asyncio's current event loop; uvloop
+# makes that loop cheaper to dispatch on. Optional for local development.
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+
+# Lambda's runtime attaches a CloudWatch handler to the root logger;
+# set LOG_LEVEL=WARNING to drop the lifecycle messages in production
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Wall Detection API v1",
     description="YOLO-based wall detection for architectural blueprints",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson encodes large wall lists much faster than stdlib json
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -40,17 +68,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize detector (singleton)
-detector = None
+# Dummy input used to run the full detect path before the first request
+WARMUP_IMAGE_SIZE = 640
+WARMUP_RUNS = 2
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize wall detector on startup"""
-    global detector
-    print("Initializing wall detector...")
-    detector = WallDetector()
-    print("Wall detector ready")
+def warm_up_detector(wall_detector: WallDetector) -> None:
+    """
+    Run dummy detections so the first real request sees warm-path latency.
+
+    The first YOLO calls pay for CUDA/cuDNN init, lazy kernel compilation
+    and graph tracing; doing that here moves it into Lambda INIT. Failures
+    are logged and ignored so warmup can never break startup.
+
+    Args:
+        wall_detector: Initialized wall detector
+    """
+    warm = np.zeros((WARMUP_IMAGE_SIZE, WARMUP_IMAGE_SIZE, 3), dtype=np.uint8)
+    try:
+        for _ in range(WARMUP_RUNS):
+            wall_detector.detect(warm, confidence_threshold=0.25)
+        logger.info("Wall detector warmed up")
+    except Exception as e:
+        logger.warning("Wall detector warmup failed: %s", e)
+
+
+def init_detector():
+    """
+    Create and warm up the wall detector.
+
+    Returns:
+        WallDetector, or None if loading failed (requests then retry lazily)
+    """
+    try:
+        logger.info("Initializing wall detector...")
+        wall_detector = WallDetector()
+        warm_up_detector(wall_detector)
+        logger.info("Wall detector ready")
+        return wall_detector
+    except Exception as e:
+        logger.warning("Wall detector init failed, will retry on request: %s", e)
+        return None
+
+
+# Initialize detector (singleton) at import so the model load runs in
+# Lambda INIT and is captured in SnapStart snapshots
+detector = init_detector()
+
+# Requests run in worker threads; YOLO predictors are not thread-safe, so
+# detector init and inference are serialized while decoding overlaps
+_detector_lock = threading.Lock()
 
 
 @app.get("/")
@@ -75,70 +142,174 @@ async def health():
     }
 
 
-@app.post("/api/detect-walls", response_model=WallDetectionResponse)
-async def detect_walls(request: WallDetectionRequest):
+def run_wall_detection(
+    image_bytes: bytes,
+    confidence_threshold: Optional[float],
+    start_time: float
+) -> dict:
     """
-    Detect walls in blueprint image.
+    Decode, validate and run wall detection for one request.
+
+    Large images are decoded at reduced resolution (never below the
+    model's input size, since YOLO downscales to it anyway); boxes and
+    image_dimensions are reported in original-image pixels. Blocking;
+    endpoints call it through asyncio.to_thread.
 
     Args:
-        request: Wall detection request with base64 image
+        image_bytes: Encoded image file contents
+        confidence_threshold: Minimum confidence for detections
+        start_time: time.time() when the request started
 
     Returns:
-        WallDetectionResponse with detected walls
+        Response body matching WallDetectionResponse
 
     Raises:
         HTTPException: On validation or processing errors
     """
     global detector
-    start_time = time.time()
 
     try:
-        # Lazy initialization for Lambda (startup event doesn't always fire)
-        if detector is None:
-            print("Lazy-initializing wall detector...")
-            detector = WallDetector()
-            print("Wall detector ready")
-
-        # Decode image
-        image = decode_base64_image(request.image)
-
-        # Validate dimensions
-        is_valid, error_msg = validate_image_dimensions(image)
+        # Retry initialization if it failed at import
+        with _detector_lock:
+            if detector is None:
+                detector = WallDetector()
+
+        # Validate original dimensions from the header, before decoding
+        width, height = read_image_size(image_bytes)
+        is_valid, error_msg = validate_image_size(width, height)
         if not is_valid:
             raise ValueError(error_msg)
 
-        # Get image dimensions
-        height, width = image.shape[:2]
+        # Decode image
+        image, _ = decode_image_bytes_reduced(
+            image_bytes,
+            WallDetector.INFERENCE_SIZE,
+            (width, height)
+        )
 
         # Detect walls
-        walls, inference_time = detector.detect(
-            image,
-            confidence_threshold=request.confidence_threshold
-        )
+        with _detector_lock:
+            walls, inference_time = detector.detect(
+                image,
+                confidence_threshold=confidence_threshold,
+                output_size=(width, height)
+            )
         
         # Calculate total processing time
         total_time = (time.time() - start_time) * 1000
         
-        return WallDetectionResponse(
-            success=True,
-            walls=walls,
-            total_walls=len(walls),
-            image_dimensions=(width, height),
-            processing_time_ms=total_time
-        )
+        # Return a plain dict: FastAPI validates it against response_model
+        # once, so building WallDetectionResponse here would validate and
+        # dump every wall twice
+        return {
+            "success": True,
+            "walls": walls,
+            "total_walls": len(walls),
+            "image_dimensions": (width, height),
+            "processing_time_ms": total_time
+        }
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"Error in wall detection: {str(e)}")
+        logger.exception("Error in wall detection")
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
 
 
+@app.post("/api/detect-walls", response_model=WallDetectionResponse)
+async def detect_walls(request: WallDetectionRequest):
+    """
+    Detect walls in blueprint image.
+
+    Args:
+        request: Wall detection request with base64 image
+
+    Returns:
+        WallDetectionResponse with detected walls
+
+    Raises:
+        HTTPException: On validation or processing errors
+    """
+    start_time = time.time()
+
+    try:
+        image_bytes = await asyncio.to_thread(decode_base64_bytes, request.image)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await asyncio.to_thread(
+        run_wall_detection,
+        image_bytes,
+        request.confidence_threshold,
+        start_time
+    )
+
+
+def _check_body_size(size: int) -> None:
+    """Raise 400 if a raw image body exceeds MAX_ENCODED_BYTES."""
+    if size > MAX_ENCODED_BYTES:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Image payload too large: {size} bytes "
+                f"(max: {MAX_ENCODED_BYTES} bytes)"
+            )
+        )
+
+
+@app.post("/api/detect-walls-binary", response_model=WallDetectionResponse)
+async def detect_walls_binary(
+    request: Request,
+    confidence_threshold: float = Query(0.10, ge=0.0, le=1.0)
+):
+    """
+    Detect walls in a blueprint sent as raw image bytes.
+
+    Takes the encoded file as an application/octet-stream body, which
+    skips the base64 transport overhead (~33%) and the base64 decode.
+
+    Args:
+        request: Raw request whose body is the encoded image file
+        confidence_threshold: Minimum confidence, as a query parameter
+
+    Returns:
+        WallDetectionResponse with detected walls
+
+    Raises:
+        HTTPException: On validation or processing errors
+    """
+    start_time = time.time()
+
+    # Reject oversize uploads from the header before reading the body
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit():
+        _check_body_size(int(content_length))
+
+    body = await request.body()
+    _check_body_size(len(body))
+
+    return await asyncio.to_thread(
+        run_wall_detection,
+        body,
+        confidence_threshold,
+        start_time
+    )
+
+
 # Lambda handler with CORS support
 # Following POC pattern: create_response function ensures CORS headers are always present
 mangum_handler = Mangum(app, lifespan="off")
 
 
+# CORS headers shared by every direct Lambda response (never mutated)
+_CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',  # CORS
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+    'Access-Control-Allow-Methods': 'POST,OPTIONS,GET'
+}
+
+
 def create_response(status_code: int, body: dict) -> dict:
     """
     Create Lambda response for API Gateway with CORS headers.
@@ -151,39 +322,57 @@ def create_response(status_code: int, body: dict) -> dict:
     Returns:
         Lambda response object with CORS headers
     """
-    import json
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',  # CORS
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'POST,OPTIONS,GET'
-        },
-        'body': json.dumps(body)
+        'headers': _CORS_HEADERS,
+        'body': orjson.dumps(body).decode()
     }
 
 
+# Warmup pings arrive every few minutes; once the model is loaded the
+# response never changes, so it is encoded once
+_WARMUP_RESPONSE = create_response(200, {
+    'success': True,
+    'message': 'Lambda warmed up',
+    'model_loaded': True
+})
+
+
+def is_warmup_event(event) -> bool:
+    """
+    Check whether an invocation is a keep-warm ping.
+
+    Args:
+        event: Lambda event
+
+    Returns:
+        True for explicit {"warmup": true} payloads and EventBridge
+        scheduled events
+    """
+    if not isinstance(event, dict):
+        return False
+    return bool(event.get('warmup')) or event.get('source') == 'aws.events'
+
+
 def handler(event, context):
     """
     Lambda handler - delegates to Mangum for FastAPI integration.
     FastAPI CORSMiddleware handles CORS headers automatically.
     Handles warmup events from EventBridge.
     """
-    import json
-    import traceback
-
-    # Handle warmup events from EventBridge
-    if isinstance(event, dict) and event.get('warmup'):
-        print("Warmup event received - keeping Lambda warm")
+    # Handle warmup events from EventBridge before any request parsing
+    if is_warmup_event(event):
+        logger.info("Warmup event received - keeping Lambda warm")
         # Ensure detector is initialized
         global detector
         if detector is None:
-            print("Initializing detector on warmup...")
-            detector = WallDetector()
-            print("Detector initialized")
+            logger.info("Initializing detector on warmup...")
+            detector = init_detector()
         else:
-            print("Detector already initialized (warm)")
+            logger.info("Detector already initialized (warm)")
+
+        if detector is not None:
+            return _WARMUP_RESPONSE
 
         return create_response(200, {
             'success': True,
@@ -198,14 +387,13 @@ def handler(event, context):
 
         # Ensure body is a string if it exists
         if 'body' in response and not isinstance(response['body'], str):
-            response['body'] = json.dumps(response['body'])
+            response['body'] = orjson.dumps(response['body']).decode()
 
         return response
 
     except Exception as e:
         # If handler fails, return error response
-        error_details = traceback.format_exc()
-        print(f"Lambda handler error: {error_details}")
+        logger.exception("Lambda handler error")
 
         return create_response(500, {
             'success': False,
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Export the wall detection YOLO weights to ONNX for CPU inference.
+
+Writes <weights>.onnx next to the .pt file. Ship it alongside the .pt
+weights and set WALL_MODEL_FORMAT=onnx on the Lambda to run inference
+through onnxruntime instead of eager PyTorch. With --int8, also writes a
+dynamically quantized <weights>.int8.onnx for WALL_MODEL_FORMAT=onnx-int8.
+"""
+
+import argparse
+import os
+from ultralytics import YOLO
+
+
+def quantize_int8(onnx_path: str) -> str:
+    """
+    Dynamically quantize an ONNX export's weights to 8 bits.
+    
+    Args:
+        onnx_path: Path to the FP32 ONNX export
+        
+    Returns:
+        Path of the quantized model (<name>.int8.onnx)
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    
+    int8_path = os.path.splitext(onnx_path)[0] + '.int8.onnx'
+    # onnxruntime's CPU ConvInteger kernel takes uint8 weights, not int8
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+
+def main():
+    """Export weights given on the command line"""
+    parser = argparse.ArgumentParser(description='Export wall model to ONNX')
+    parser.add_argument(
+        'weights',
+        nargs='?',
+        default='models/best_wall_model.pt',
+        help='Path to YOLO .pt weights (default: models/best_wall_model.pt)'
+    )
+    parser.add_argument(
+        '--imgsz',
+        type=int,
+        default=640,
+        help='Fixed input size baked into the export (default: 640)'
+    )
+    parser.add_argument(
+        '--int8',
+        action='store_true',
+        help='Also write a dynamically quantized INT8 model'
+    )
+    args = parser.parse_args()
+
+    onnx_path = YOLO(args.weights).export(format='onnx', imgsz=args.imgsz, half=False)
+    print(f"Exported {onnx_path}")
+
+    if args.int8:
+        print(f"Quantized {quantize_int8(onnx_path)}")
+
+
+if __name__ == '__main__':
+    main()
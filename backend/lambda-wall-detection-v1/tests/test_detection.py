@@ -15,6 +15,18 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.detection import WallDetector
 
 
+def _mock_result(xyxy, conf):
+    """Build a mock YOLO result whose boxes expose xyxy/conf arrays"""
+    mock_result = Mock()
+    mock_result.boxes.xyxy.cpu.return_value.numpy.return_value = (
+        np.array(xyxy, dtype=np.float64).reshape(-1, 4)
+    )
+    mock_result.boxes.conf.cpu.return_value.numpy.return_value = (
+        np.array(conf, dtype=np.float64)
+    )
+    return mock_result
+
+
 class TestWallDetector:
     """Tests for WallDetector class"""
     
@@ -58,27 +70,115 @@ class TestWallDetector:
                 mock_yolo.assert_called_once_with("/app/models/best_wall_model.pt")
                 assert detector.model is not None
     
+    def test_load_model_runs_warmup_inference(self):
+        """Test model load runs one dummy inference on a blank image"""
+        with patch('app.detection.YOLO') as mock_yolo:
+            mock_model = Mock()
+            mock_yolo.return_value = mock_model
+            
+            with patch('os.path.exists', return_value=True), \
+                    patch.dict(os.environ, {'WARMUP': '1'}):
+                WallDetector()
+                
+                mock_model.predict.assert_called_once()
+                warmup_image = mock_model.predict.call_args[0][0]
+                assert warmup_image.shape == (640, 640, 3)
+                assert not warmup_image.any()
+    
+    def test_load_model_skips_warmup_when_disabled(self):
+        """Test WARMUP=0 skips the dummy inference"""
+        with patch('app.detection.YOLO') as mock_yolo:
+            mock_model = Mock()
+            mock_yolo.return_value = mock_model
+            
+            with patch('os.path.exists', return_value=True), \
+                    patch.dict(os.environ, {'WARMUP': '0'}):
+                WallDetector()
+                
+                mock_model.predict.assert_not_called()
+    
+    def test_load_model_survives_warmup_failure(self):
+        """Test a failing warmup inference does not break model load"""
+        with patch('app.detection.YOLO') as mock_yolo:
+            mock_model = Mock()
+            mock_model.predict.side_effect = RuntimeError("warmup failed")
+            mock_yolo.return_value = mock_model
+            
+            with patch('os.path.exists', return_value=True), \
+                    patch.dict(os.environ, {'WARMUP': '1'}):
+                detector = WallDetector()
+                
+                assert detector.model is mock_model
+    
+    def test_load_model_uses_onnx_export_on_cpu(self):
+        """Test WALL_MODEL_FORMAT=onnx loads the sibling .onnx export on CPU"""
+        with patch('app.detection.YOLO') as mock_yolo:
+            with patch('os.path.exists', return_value=True), \
+                    patch('app.detection.torch.cuda.is_available', return_value=False), \
+                    patch.dict(os.environ, {'WALL_MODEL_FORMAT': 'onnx'}):
+                detector = WallDetector()
+                
+                mock_yolo.assert_called_once_with("/app/models/best_wall_model.onnx", task='detect')
+                assert detector.get_model_info()["model_format"] == "onnx"
+    
+    def test_load_model_onnx_falls_back_without_export(self):
+        """Test WALL_MODEL_FORMAT=onnx keeps the .pt weights when no export exists"""
+        with patch('app.detection.YOLO') as mock_yolo:
+            with patch('os.path.exists', side_effect=lambda path: path.endswith('.pt')), \
+                    patch('app.detection.torch.cuda.is_available', return_value=False), \
+                    patch.dict(os.environ, {'WALL_MODEL_FORMAT': 'onnx'}):
+                detector = WallDetector()
+                
+                mock_yolo.assert_called_once_with("/app/models/best_wall_model.pt")
+                assert detector.model_format == "pt"
+    
+    def test_load_model_uses_int8_export(self):
+        """Test WALL_MODEL_FORMAT=onnx-int8 prefers the quantized export"""
+        with patch('app.detection.YOLO') as mock_yolo:
+            with patch('os.path.exists', return_value=True), \
+                    patch('app.detection.torch.cuda.is_available', return_value=False), \
+                    patch.dict(os.environ, {'WALL_MODEL_FORMAT': 'onnx-int8'}):
+                WallDetector()
+                
+                mock_yolo.assert_called_once_with("/app/models/best_wall_model.int8.onnx", task='detect')
+    
+    def test_load_model_int8_falls_back_to_fp32_export(self):
+        """Test onnx-int8 uses the FP32 export when no quantized one exists"""
+        with patch('app.detection.YOLO') as mock_yolo:
+            with patch('os.path.exists', side_effect=lambda path: not path.endswith('.int8.onnx')), \
+                    patch('app.detection.torch.cuda.is_available', return_value=False), \
+                    patch.dict(os.environ, {'WALL_MODEL_FORMAT': 'onnx-int8'}):
+                WallDetector()
+                
+                mock_yolo.assert_called_once_with("/app/models/best_wall_model.onnx", task='detect')
+    
     def test_load_model_with_missing_file(self):
         """Test loading model with missing model file raises error"""
         with patch('os.path.exists', return_value=False):
             with pytest.raises(FileNotFoundError):
                 WallDetector()
     
+    def test_s3_client_is_reused(self):
+        """Test the S3 client is created once and shared across downloads"""
+        with patch('app.detection._s3_client', None), \
+                patch('app.detection.boto3.client') as mock_client:
+            from app import detection
+            
+            first = detection._get_s3_client()
+            second = detection._get_s3_client()
+            
+            assert first is second
+            mock_client.assert_called_once()
+    
     def test_detect_with_valid_image(self):
         """Test wall detection with valid image"""
         with patch('app.detection.YOLO') as mock_yolo:
             # Create mock YOLO model and results
             mock_model = Mock()
-            mock_box1 = Mock()
-            mock_box1.xyxy = [np.array([10, 20, 50, 60])]
-            mock_box1.conf = [0.85]
-            
-            mock_box2 = Mock()
-            mock_box2.xyxy = [np.array([100, 120, 150, 170])]
-            mock_box2.conf = [0.75]
-            
-            mock_result = Mock()
-            mock_result.boxes = [mock_box1, mock_box2]
+            mock_result = _mock_result(
+                [[10, 20, 50, 60], [100, 120, 150, 170]],
+                [0.85, 0.75]
+            )
             
             mock_results = [mock_result]
             mock_model.return_value = mock_results
@@ -107,8 +207,7 @@ class TestWallDetector:
         """Test detection with custom confidence threshold"""
         with patch('app.detection.YOLO') as mock_yolo:
             mock_model = Mock()
-            mock_result = Mock()
-            mock_result.boxes = []
+            mock_result = _mock_result([], [])
             mock_model.return_value = [mock_result]
             mock_yolo.return_value = mock_model
             
@@ -127,12 +226,7 @@ class TestWallDetector:
         """Test that detect() returns correct format"""
         with patch('app.detection.YOLO') as mock_yolo:
             mock_model = Mock()
-            mock_box = Mock()
-            mock_box.xyxy = [np.array([10, 20, 50, 60])]
-            mock_box.conf = [0.85]
-            
-            mock_result = Mock()
-            mock_result.boxes = [mock_box]
+            mock_result = _mock_result([[10, 20, 50, 60]], [0.85])
             mock_model.return_value = [mock_result]
             mock_yolo.return_value = mock_model
             
@@ -149,9 +243,94 @@ class TestWallDetector:
                 assert "id" in walls[0]
                 assert "bounding_box" in walls[0]
                 assert "confidence" in walls[0]
+                # Plain Python types, not NumPy scalars
+                assert all(type(v) is int for v in walls[0]["bounding_box"])
+                assert type(walls[0]["confidence"]) is float
                 assert isinstance(inference_time, float)
                 assert inference_time >= 0
     
+    def test_detect_cpu_path_passes_numpy_image(self):
+        """Test detection without CUDA feeds the NumPy image to YOLO unchanged"""
+        with patch('app.detection.YOLO') as mock_yolo:
+            mock_model = Mock()
+            mock_result = _mock_result([[10, 20, 50, 60]], [0.85])
+            mock_model.return_value = [mock_result]
+            mock_yolo.return_value = mock_model
+            
+            with patch('os.path.exists', return_value=True), \
+                    patch('app.detection.torch.cuda.is_available', return_value=False):
+                detector = WallDetector()
+                
+                test_image = np.zeros((200, 200, 3), dtype=np.uint8)
+                walls, _ = detector.detect(test_image)
+                
+                assert mock_model.call_args[0][0] is test_image
+                assert walls[0]["bounding_box"] == [10, 20, 50, 60]
+    
+    def test_detect_gpu_path_rescales_boxes(self):
+        """Test detection with CUDA feeds the device tensor and undoes the letterbox"""
+        with patch('app.detection.YOLO') as mock_yolo:
+            mock_model = Mock()
+            mock_result = _mock_result([[30, 20, 70, 60]], [0.85])
+            mock_model.return_value = [mock_result]
+            mock_yolo.return_value = mock_model
+            
+            sentinel = object()
+            
+            with patch('os.path.exists', return_value=True), \
+                    patch('app.detection.torch.cuda.is_available', return_value=True):
+                detector = WallDetector()
+                
+                with patch.object(
+                    detector,
+                    '_preprocess_on_gpu',
+                    return_value=(sentinel, 2.0, (10, 0))
+                ):
+                    test_image = np.zeros((200, 200, 3), dtype=np.uint8)
+                    walls, _ = detector.detect(test_image)
+                
+                assert mock_model.call_args[0][0] is sentinel
+                # (coord - pad) / gain
+                assert walls[0]["bounding_box"] == [10, 10, 30, 30]
+    
+    def test_detect_scales_boxes_to_output_size(self):
+        """Test boxes from a reduced-resolution decode map back to the original size"""
+        with patch('app.detection.YOLO') as mock_yolo:
+            mock_model = Mock()
+            mock_result = _mock_result([[10, 20, 50, 60], [150, 80, 250, 100]], [0.85, 0.7])
+            mock_model.return_value = [mock_result]
+            mock_yolo.return_value = mock_model
+            
+            with patch('os.path.exists', return_value=True), \
+                    patch('app.detection.torch.cuda.is_available', return_value=False):
+                detector = WallDetector()
+                
+                # Original 800x400 decoded at 1/4 -> 200x100
+                test_image = np.zeros((100, 200, 3), dtype=np.uint8)
+                walls, _ = detector.detect(test_image, output_size=(800, 400))
+                
+                assert walls[0]["bounding_box"] == [40, 80, 200, 240]
+                # Clipped to the original bounds, not the reduced ones
+                assert walls[1]["bounding_box"] == [600, 320, 800, 400]
+    
+    def test_detect_clips_boxes_to_image_bounds(self):
+        """Test detected boxes are clamped to the image size"""
+        with patch('app.detection.YOLO') as mock_yolo:
+            mock_model = Mock()
+            mock_model.return_value = [
+                _mock_result([[-5, -10, 250, 120.6]], [0.85])
+            ]
+            mock_yolo.return_value = mock_model
+            
+            with patch('os.path.exists', return_value=True), \
+                    patch('app.detection.torch.cuda.is_available', return_value=False):
+                detector = WallDetector()
+                
+                test_image = np.zeros((100, 200, 3), dtype=np.uint8)
+                walls, _ = detector.detect(test_image)
+                
+                assert walls[0]["bounding_box"] == [0, 0, 200, 100]
+    
     def test_get_model_info(self):
         """Test get_model_info() returns correct information"""
         with patch('app.detection.YOLO') as mock_yolo:
@@ -176,6 +355,7 @@ class TestWallDetector:
         detector.model_path = "/test/model.pt"
         detector.confidence_threshold = 0.10
         detector.model = None
+        detector.model_format = None
         
         info = detector.get_model_info()
         
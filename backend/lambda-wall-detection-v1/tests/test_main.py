@@ -4,41 +4,14 @@ Tests endpoints, error handling, and Lambda handler.
 """
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch
 import sys
 from pathlib import Path
 import numpy as np
 
-# Add parent directory to path for imports
+# Add the Lambda root (for app) and backend (for shared) to the path
 sys.path.insert(0, str(Path(__file__).parent.parent))
-
-# Mock shared module before importing main
-sys.path.insert(0, str(Path(__file__).parent.parent.parent / "shared"))
-
-# Mock the shared models and utilities
-mock_models = MagicMock()
-mock_image_utils = MagicMock()
-
-# Create mock modules
-import types
-shared_models = types.ModuleType('shared.models')
-shared_image_utils = types.ModuleType('shared.image_utils')
-
-# Mock the classes and functions
-mock_wall = Mock()
-mock_wall.id = "wall_001"
-mock_wall.bounding_box = (10, 20, 50, 60)
-mock_wall.confidence = 0.85
-
-shared_models.WallDetectionRequest = Mock
-shared_models.WallDetectionResponse = Mock
-shared_models.ErrorResponse = Mock
-
-shared_image_utils.decode_base64_image = Mock(return_value=np.zeros((200, 200, 3), dtype=np.uint8))
-shared_image_utils.validate_image_dimensions = Mock(return_value=(True, ""))
-
-sys.modules['shared.models'] = shared_models
-sys.modules['shared.image_utils'] = shared_image_utils
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.main import app
 
@@ -100,9 +73,11 @@ class TestDetectWallsEndpoint:
         )
         
         with patch('app.main.detector', mock_detector):
-            with patch('shared.image_utils.decode_base64_image') as mock_decode:
-                with patch('shared.image_utils.validate_image_dimensions') as mock_validate:
-                    mock_decode.return_value = np.zeros((200, 200, 3), dtype=np.uint8)
+            with patch('app.main.read_image_size') as mock_size, \
+                 patch('app.main.decode_image_bytes_reduced') as mock_decode:
+                with patch('app.main.validate_image_size') as mock_validate:
+                    mock_decode.return_value = (np.zeros((200, 200, 3), dtype=np.uint8), (200, 200))
+                    mock_size.return_value = (200, 200)
                     mock_validate.return_value = (True, "")
                     
                     client = TestClient(app)
@@ -120,12 +95,12 @@ class TestDetectWallsEndpoint:
                     assert data["success"] == True
                     assert len(data["walls"]) == 2
                     assert data["total_walls"] == 2
-                    assert data["image_dimensions"] == (200, 200)
+                    assert data["image_dimensions"] == [200, 200]
                     assert "processing_time_ms" in data
     
     def test_detect_walls_with_invalid_base64(self):
         """Test wall detection with invalid base64 image"""
-        with patch('shared.image_utils.decode_base64_image') as mock_decode:
+        with patch('app.main.decode_base64_bytes') as mock_decode:
             mock_decode.side_effect = ValueError("Failed to decode image")
             
             client = TestClient(app)
@@ -142,45 +117,49 @@ class TestDetectWallsEndpoint:
     
     def test_detect_walls_with_image_too_large(self):
         """Test wall detection with image that's too large"""
-        with patch('shared.image_utils.decode_base64_image') as mock_decode:
-            with patch('shared.image_utils.validate_image_dimensions') as mock_validate:
-                # Create large image
-                large_image = np.zeros((5000, 5000, 3), dtype=np.uint8)
-                mock_decode.return_value = large_image
-                mock_validate.return_value = (False, "Image too large: 5000x5000 (max: 4096x4096)")
-                
-                client = TestClient(app)
-                
-                request_data = {
-                    "image": "base64encodedstring",
-                    "confidence_threshold": 0.10
-                }
-                
-                response = client.post("/api/detect-walls", json=request_data)
-                
-                assert response.status_code == 400
-                assert "too large" in response.json()["detail"].lower()
+        with patch('app.main.detector', Mock()):
+            with patch('app.main.read_image_size') as mock_size, \
+                 patch('app.main.decode_image_bytes_reduced') as mock_decode:
+                with patch('app.main.validate_image_size') as mock_validate:
+                    # Large image, rejected from its header
+                    mock_size.return_value = (5000, 5000)
+                    mock_validate.return_value = (False, "Image too large: 5000x5000 (max: 4096x4096)")
+                    
+                    client = TestClient(app)
+                    
+                    request_data = {
+                        "image": "base64encodedstring",
+                        "confidence_threshold": 0.10
+                    }
+                    
+                    response = client.post("/api/detect-walls", json=request_data)
+                    
+                    assert response.status_code == 400
+                    assert "too large" in response.json()["detail"].lower()
+                    mock_decode.assert_not_called()
     
     def test_detect_walls_with_image_too_small(self):
         """Test wall detection with image that's too small"""
-        with patch('shared.image_utils.decode_base64_image') as mock_decode:
-            with patch('shared.image_utils.validate_image_dimensions') as mock_validate:
-                # Create small image
-                small_image = np.zeros((50, 50, 3), dtype=np.uint8)
-                mock_decode.return_value = small_image
-                mock_validate.return_value = (False, "Image too small: 50x50 (min: 100x100)")
-                
-                client = TestClient(app)
-                
-                request_data = {
-                    "image": "base64encodedstring",
-                    "confidence_threshold": 0.10
-                }
-                
-                response = client.post("/api/detect-walls", json=request_data)
-                
-                assert response.status_code == 400
-                assert "too small" in response.json()["detail"].lower()
+        with patch('app.main.detector', Mock()):
+            with patch('app.main.read_image_size') as mock_size, \
+                 patch('app.main.decode_image_bytes_reduced') as mock_decode:
+                with patch('app.main.validate_image_size') as mock_validate:
+                    # Small image, rejected from its header
+                    mock_size.return_value = (50, 50)
+                    mock_validate.return_value = (False, "Image too small: 50x50 (min: 100x100)")
+                    
+                    client = TestClient(app)
+                    
+                    request_data = {
+                        "image": "base64encodedstring",
+                        "confidence_threshold": 0.10
+                    }
+                    
+                    response = client.post("/api/detect-walls", json=request_data)
+                    
+                    assert response.status_code == 400
+                    assert "too small" in response.json()["detail"].lower()
+                    mock_decode.assert_not_called()
     
     def test_detect_walls_with_custom_confidence_threshold(self):
         """Test wall detection with custom confidence threshold"""
@@ -188,9 +167,11 @@ class TestDetectWallsEndpoint:
         mock_detector.detect.return_value = ([], 50.0)
         
         with patch('app.main.detector', mock_detector):
-            with patch('shared.image_utils.decode_base64_image') as mock_decode:
-                with patch('shared.image_utils.validate_image_dimensions') as mock_validate:
-                    mock_decode.return_value = np.zeros((200, 200, 3), dtype=np.uint8)
+            with patch('app.main.read_image_size') as mock_size, \
+                 patch('app.main.decode_image_bytes_reduced') as mock_decode:
+                with patch('app.main.validate_image_size') as mock_validate:
+                    mock_decode.return_value = (np.zeros((200, 200, 3), dtype=np.uint8), (200, 200))
+                    mock_size.return_value = (200, 200)
                     mock_validate.return_value = (True, "")
                     
                     client = TestClient(app)
@@ -214,9 +195,11 @@ class TestDetectWallsEndpoint:
         mock_detector.detect.side_effect = Exception("Model inference failed")
         
         with patch('app.main.detector', mock_detector):
-            with patch('shared.image_utils.decode_base64_image') as mock_decode:
-                with patch('shared.image_utils.validate_image_dimensions') as mock_validate:
-                    mock_decode.return_value = np.zeros((200, 200, 3), dtype=np.uint8)
+            with patch('app.main.read_image_size') as mock_size, \
+                 patch('app.main.decode_image_bytes_reduced') as mock_decode:
+                with patch('app.main.validate_image_size') as mock_validate:
+                    mock_decode.return_value = (np.zeros((200, 200, 3), dtype=np.uint8), (200, 200))
+                    mock_size.return_value = (200, 200)
                     mock_validate.return_value = (True, "")
                     
                     client = TestClient(app)
@@ -231,6 +214,92 @@ class TestDetectWallsEndpoint:
                     assert response.status_code == 500
                     assert "Detection failed" in response.json()["detail"]
 
+    def test_detect_walls_binary_with_raw_image(self):
+        """Test binary endpoint decodes the raw body and honours the query threshold"""
+        mock_detector = Mock()
+        mock_detector.detect.return_value = (
+            [{"id": "wall_001", "bounding_box": [10, 20, 50, 60], "confidence": 0.85}],
+            12.0
+        )
+        
+        with patch('app.main.detector', mock_detector):
+            with patch('app.main.read_image_size') as mock_size, \
+                 patch('app.main.decode_image_bytes_reduced') as mock_decode:
+                mock_decode.return_value = (np.zeros((200, 300, 3), dtype=np.uint8), (300, 200))
+                mock_size.return_value = (300, 200)
+                
+                client = TestClient(app)
+                response = client.post(
+                    "/api/detect-walls-binary?confidence_threshold=0.2",
+                    content=b"\x89PNG raw bytes",
+                    headers={"Content-Type": "application/octet-stream"}
+                )
+                
+                assert response.status_code == 200
+                assert mock_decode.call_args[0][0] == b"\x89PNG raw bytes"
+                assert mock_detector.detect.call_args[1]['confidence_threshold'] == 0.2
+                assert response.json()["image_dimensions"] == [300, 200]
+    
+    def test_detect_walls_binary_with_corrupt_image(self):
+        """Test binary endpoint returns 400 for undecodable bytes"""
+        with patch('app.main.detector', Mock()):
+            with patch('app.main.read_image_size') as mock_size, \
+                 patch('app.main.decode_image_bytes_reduced') as mock_decode:
+                mock_size.side_effect = ValueError("Failed to decode image")
+                
+                client = TestClient(app)
+                response = client.post("/api/detect-walls-binary", content=b"junk")
+                
+                assert response.status_code == 400
+                assert "Failed to decode" in response.json()["detail"]
+                mock_decode.assert_not_called()
+
+    @pytest.mark.parametrize("threshold", [-0.1, 1.5])
+    def test_detect_walls_binary_rejects_out_of_range_threshold(self, threshold):
+        """Test binary endpoint validates confidence_threshold like the JSON model"""
+        with patch('app.main.run_wall_detection') as mock_run:
+            client = TestClient(app)
+            response = client.post(
+                "/api/detect-walls-binary",
+                params={"confidence_threshold": threshold},
+                content=b"jpeg"
+            )
+            
+            assert response.status_code == 422
+            mock_run.assert_not_called()
+    
+    def test_detect_walls_binary_rejects_oversize_body(self):
+        """Test binary endpoint rejects bodies over MAX_ENCODED_BYTES before decoding"""
+        with patch('app.main.MAX_ENCODED_BYTES', 8):
+            with patch('app.main.read_image_size') as mock_size, \
+                 patch('app.main.decode_image_bytes_reduced') as mock_decode:
+                client = TestClient(app)
+                response = client.post("/api/detect-walls-binary", content=b"x" * 16)
+                
+                assert response.status_code == 400
+                assert "too large" in response.json()["detail"]
+                mock_size.assert_not_called()
+                mock_decode.assert_not_called()
+
+    def test_detect_walls_reports_original_dimensions(self):
+        """Test a reduced-resolution decode still reports original-image pixels"""
+        mock_detector = Mock()
+        mock_detector.detect.return_value = ([], 5.0)
+        
+        with patch('app.main.detector', mock_detector):
+            with patch('app.main.read_image_size') as mock_size, \
+                 patch('app.main.decode_image_bytes_reduced') as mock_decode:
+                # 4000x2000 original decoded at 1/4
+                mock_decode.return_value = (np.zeros((500, 1000, 3), dtype=np.uint8), (4000, 2000))
+                mock_size.return_value = (4000, 2000)
+                
+                client = TestClient(app)
+                response = client.post("/api/detect-walls-binary", content=b"jpeg")
+                
+                assert response.status_code == 200
+                assert response.json()["image_dimensions"] == [4000, 2000]
+                assert mock_detector.detect.call_args[1]['output_size'] == (4000, 2000)
+
 
 class TestLambdaHandler:
     """Tests for Lambda handler"""
@@ -241,3 +310,83 @@ class TestLambdaHandler:
         assert handler is not None
         assert callable(handler)
 
+    def test_create_response_body_is_json_string(self):
+        """Test create_response encodes the body as a JSON string"""
+        import json
+        from app.main import create_response
+
+        response = create_response(200, {'success': True, 'walls': []})
+
+        assert isinstance(response['body'], str)
+        assert json.loads(response['body']) == {'success': True, 'walls': []}
+        assert response['headers']['Access-Control-Allow-Origin'] == '*'
+
+
+class TestWarmup:
+    """Tests for detector warmup"""
+
+    def test_warm_up_detector_runs_dummy_detections(self):
+        """Test warmup runs dummy detections on a blank image"""
+        from app.main import warm_up_detector, WARMUP_RUNS, WARMUP_IMAGE_SIZE
+
+        mock_detector = Mock()
+        mock_detector.detect.return_value = ([], 1.0)
+
+        warm_up_detector(mock_detector)
+
+        assert mock_detector.detect.call_count == WARMUP_RUNS
+        image = mock_detector.detect.call_args[0][0]
+        assert image.shape == (WARMUP_IMAGE_SIZE, WARMUP_IMAGE_SIZE, 3)
+        assert not image.any()
+
+    def test_warm_up_detector_survives_failure(self):
+        """Test warmup failures don't propagate"""
+        from app.main import warm_up_detector
+
+        mock_detector = Mock()
+        mock_detector.detect.side_effect = RuntimeError("CUDA error")
+
+        warm_up_detector(mock_detector)
+
+        mock_detector.detect.assert_called_once()
+
+    def test_is_warmup_event(self):
+        """Test warmup detection for explicit and EventBridge events"""
+        from app.main import is_warmup_event
+
+        assert is_warmup_event({"warmup": True})
+        assert is_warmup_event({"source": "aws.events", "detail-type": "Scheduled Event"})
+        assert not is_warmup_event({"httpMethod": "POST", "path": "/api/detect-walls"})
+        assert not is_warmup_event(None)
+
+    def test_handler_warmup_skips_mangum(self):
+        """Test EventBridge warmup returns 200 without dispatching to Mangum"""
+        from app.main import handler
+
+        with patch('app.main.detector', Mock()):
+            with patch('app.main.mangum_handler') as mock_mangum:
+                response = handler({"source": "aws.events"}, None)
+
+                assert response['statusCode'] == 200
+                mock_mangum.assert_not_called()
+
+    def test_handler_warmup_reports_model_state(self):
+        """Test warmup reports whether the model loaded"""
+        import json
+        from app.main import handler
+
+        with patch('app.main.detector', Mock()):
+            body = json.loads(handler({"warmup": True}, None)['body'])
+            assert body['model_loaded'] is True
+
+        with patch('app.main.detector', None), \
+                patch('app.main.init_detector', return_value=None):
+            body = json.loads(handler({"warmup": True}, None)['body'])
+            assert body['model_loaded'] is False
+
+    def test_init_detector_returns_none_on_failure(self):
+        """Test a failed model load at import leaves detector for lazy retry"""
+        from app.main import init_detector
+
+        with patch('app.main.WallDetector', side_effect=FileNotFoundError("no model")):
+            assert init_detector() is None
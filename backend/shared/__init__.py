@@ -11,9 +11,14 @@ from .models import (
     GeometricConversionRequest,
 )
 from .image_utils import (
+    decode_base64_bytes,
     decode_base64_image,
+    decode_image_bytes,
+    decode_image_bytes_reduced,
+    read_image_size,
     encode_image_to_base64,
     validate_image_dimensions,
+    validate_image_size,
     resize_if_needed,
     draw_rooms_on_image,
 )
@@ -28,9 +33,14 @@ __all__ = [
     "WallDetectionRequest",
     "WallDetectionResponse",
     "GeometricConversionRequest",
+    "decode_base64_bytes",
     "decode_base64_image",
+    "decode_image_bytes",
+    "decode_image_bytes_reduced",
+    "read_image_size",
     "encode_image_to_base64",
     "validate_image_dimensions",
+    "validate_image_size",
     "resize_if_needed",
     "draw_rooms_on_image",
 ]
@@ -2,7 +2,9 @@
 Shared image processing utilities.
 Pure helper functions with no business logic.
 """
-import base64
+import binascii
+import functools
+import pybase64
 import numpy as np
 import cv2
 from PIL import Image
@@ -10,6 +12,75 @@ from io import BytesIO
 from typing import Tuple, Optional, List
 
 
+# Longest data URL header ("data:image/png;base64,") searched for a comma
+_DATA_URL_HEADER_MAX = 256
+
+# Largest image file accepted; checked from the base64 length (or raw
+# body size) before decoding (a 4096x4096 RGBA PNG is at most ~64 MB)
+MAX_ENCODED_BYTES = 64 * 1024 * 1024
+
+# Reduced-resolution decode flags, largest reduction first. libjpeg
+# scales during the IDCT; other formats are decoded then downsampled.
+_REDUCED_COLOR_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# JPEG encode settings: baseline Huffman tables and no progressive scans
+# keep libjpeg-turbo on its fastest path
+_JPEG_ENCODE_PARAMS = [
+    cv2.IMWRITE_JPEG_QUALITY, 85,
+    cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+    cv2.IMWRITE_JPEG_PROGRESSIVE, 0,
+]
+
+
+def decode_base64_bytes(base64_string: str) -> bytes:
+    """
+    Decode base64 string (optionally a data URL) to encoded image bytes.
+    
+    Args:
+        base64_string: Base64 encoded image
+        
+    Returns:
+        Encoded image file contents
+        
+    Raises:
+        ValueError: If base64 string is invalid
+    """
+    # Remove data URL prefix if present. Only the header can hold a
+    # comma (it is not in the base64 alphabet), so don't scan or
+    # split the whole multi-MB payload looking for one.
+    comma = base64_string.find(',', 0, _DATA_URL_HEADER_MAX)
+    if comma != -1:
+        base64_string = base64_string[comma + 1:]
+    
+    # Reject oversize payloads before allocating the decoded buffer
+    approx_size = (len(base64_string) * 3) >> 2
+    if approx_size > MAX_ENCODED_BYTES:
+        raise ValueError(
+            f"Image payload too large: ~{approx_size} bytes "
+            f"(max: {MAX_ENCODED_BYTES} bytes)"
+        )
+        
+    try:
+        # pybase64 is a SIMD decoder and accepts str directly
+        try:
+            return pybase64.b64decode(base64_string, validate=False)
+        except binascii.Error:
+            # Accept input with the trailing '=' padding stripped
+            missing_padding = -len(base64_string) % 4
+            if not missing_padding:
+                raise
+            return pybase64.b64decode(
+                base64_string + '=' * missing_padding,
+                validate=False
+            )
+    except Exception as e:
+        raise ValueError(f"Failed to decode image: {str(e)}")
+
+
 def decode_base64_image(base64_string: str) -> np.ndarray:
     """
     Decode base64 string to OpenCV image array.
@@ -23,13 +94,57 @@ def decode_base64_image(base64_string: str) -> np.ndarray:
     Raises:
         ValueError: If base64 string is invalid
     """
+    return decode_image_bytes(decode_base64_bytes(base64_string))
+
+
+def decode_image_bytes(image_bytes: bytes) -> np.ndarray:
+    """
+    Decode raw encoded image bytes (PNG, JPEG, ...) to OpenCV image array.
+    
+    OpenCV decodes straight to 8-bit BGR (dropping alpha, expanding
+    grayscale and palettes) in one pass; formats it can't read, such as
+    GIF, go through PIL instead. EXIF orientation is not applied.
+    
+    Args:
+        image_bytes: Encoded image file contents
+        
+    Returns:
+        OpenCV image as numpy array (BGR format)
+        
+    Raises:
+        ValueError: If the bytes are not a decodable image
+    """
+    # frombuffer wraps the request body without copying it
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    if buffer.size:
+        image = cv2.imdecode(
+            buffer,
+            cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+        )
+        if image is not None:
+            return image
+    return _decode_with_pil(image_bytes)
+
+
+def _decode_with_pil(image_bytes: bytes) -> np.ndarray:
+    """
+    Decode image bytes with PIL, for formats OpenCV can't read.
+    
+    Args:
+        image_bytes: Encoded image file contents
+        
+    Returns:
+        OpenCV image as numpy array (BGR format)
+        
+    Raises:
+        ValueError: If the bytes are not a decodable image
+    """
     try:
-        # Remove data URL prefix if present
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
-            
-        image_data = base64.b64decode(base64_string)
-        image = Image.open(BytesIO(image_data))
+        image = Image.open(BytesIO(image_bytes))
+        # Palette (GIF) and other modes would otherwise come out as raw
+        # indices or unexpected dtypes
+        if image.mode not in ('L', 'RGB', 'RGBA'):
+            image = image.convert('RGB')
         
         # Convert to BGR for OpenCV
         image_array = np.array(image)
@@ -45,13 +160,87 @@ def decode_base64_image(base64_string: str) -> np.ndarray:
         raise ValueError(f"Failed to decode image: {str(e)}")
 
 
-def encode_image_to_base64(image: np.ndarray, format: str = "png") -> str:
+def read_image_size(image_bytes: bytes) -> Tuple[int, int]:
+    """
+    Read image dimensions from the file header without decoding pixels.
+    
+    Args:
+        image_bytes: Encoded image file contents
+        
+    Returns:
+        Tuple of (width, height)
+        
+    Raises:
+        ValueError: If the bytes are not a recognizable image
+    """
+    try:
+        # PIL parses only the header here, not the pixel data
+        return Image.open(BytesIO(image_bytes)).size
+    except Exception as e:
+        raise ValueError(f"Failed to decode image: {str(e)}")
+
+
+def decode_image_bytes_reduced(
+    image_bytes: bytes,
+    min_long_side: int,
+    original_size: Optional[Tuple[int, int]] = None
+) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Decode image bytes at the lowest resolution that keeps the long side
+    at or above min_long_side.
+    
+    Uses OpenCV's reduced decode (1/2, 1/4 or 1/8), which for JPEG
+    downsamples inside the decoder instead of materializing the full
+    image. Images already near min_long_side decode at full size.
+    
+    Args:
+        image_bytes: Encoded image file contents
+        min_long_side: Smallest acceptable long side after reduction
+        original_size: (width, height) from read_image_size, if the
+            caller already read the header
+        
+    Returns:
+        Tuple of (image, (original_width, original_height))
+        The image is BGR; original size is read from the file header
+        
+    Raises:
+        ValueError: If the bytes are not a decodable image
+    """
+    if original_size is None:
+        original_size = read_image_size(image_bytes)
+    
+    long_side = max(original_size)
+    flags = cv2.IMREAD_COLOR
+    for factor, reduced_flags in _REDUCED_COLOR_FLAGS:
+        if -(-long_side // factor) >= min_long_side:
+            flags = reduced_flags
+            break
+    # Keep stored pixel orientation so the decode matches the header size
+    flags |= cv2.IMREAD_IGNORE_ORIENTATION
+    
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    image = cv2.imdecode(buffer, flags)
+    if image is None:
+        # Formats OpenCV can't read (GIF) decode at full size via PIL
+        image = _decode_with_pil(image_bytes)
+    return image, original_size
+
+
+def encode_image_to_base64(
+    image: np.ndarray,
+    format: str = "png",
+    palette: bool = False
+) -> str:
     """
     Encode OpenCV image to base64 string.
     
     Args:
         image: OpenCV image array
-        format: Image format (png, jpg)
+        format: Image format (png, jpg). PNG stays the default: the flat
+            color visualizations encode faster and smaller than JPEG.
+        palette: Quantize a color PNG to a 16-color palette first. Exact
+            for room visualizations (a handful of flat colors) and about
+            5x smaller, at roughly twice the encode time.
         
     Returns:
         Base64 encoded string
@@ -59,10 +248,30 @@ def encode_image_to_base64(image: np.ndarray, format: str = "png") -> str:
     Raises:
         ValueError: If encoding fails
     """
-    success, buffer = cv2.imencode(f'.{format}', image)
+    if palette and format == "png" and image.ndim == 3:
+        return _encode_palette_png(image)
+    
+    # PNG gets no params on purpose: OpenCV's default (level 1, RLE, SUB
+    # filter) is its fastest mode, and any explicit compression setting
+    # also switches on adaptive filtering, which is several times slower
+    params = _JPEG_ENCODE_PARAMS if format in ("jpg", "jpeg") else []
+    success, buffer = cv2.imencode(f'.{format}', image, params)
     if not success:
         raise ValueError(f"Failed to encode image as {format}")
-    return base64.b64encode(buffer).decode('utf-8')
+    # imencode returns a contiguous buffer, encoded without a bytes copy
+    return pybase64.b64encode_as_string(buffer)
+
+
+def _encode_palette_png(image: np.ndarray) -> str:
+    """Encode a BGR/BGRA image as a 16-color paletted PNG, base64 encoded."""
+    code = cv2.COLOR_BGR2RGB if image.shape[2] == 3 else cv2.COLOR_BGRA2RGB
+    quantized = Image.fromarray(cv2.cvtColor(image, code)).quantize(
+        colors=16,
+        method=Image.Quantize.FASTOCTREE
+    )
+    buffer = BytesIO()
+    quantized.save(buffer, format="PNG", optimize=False, compress_level=1)
+    return pybase64.b64encode_as_string(buffer.getbuffer())
 
 
 def validate_image_dimensions(
@@ -79,16 +288,36 @@ def validate_image_dimensions(
     Returns:
         Tuple of (is_valid, error_message)
     """
-    if image is None or image.size == 0:
+    if image is None or image.ndim < 2:
         return False, "Image is empty"
         
     h, w = image.shape[:2]
+    if h == 0 or w == 0:
+        return False, "Image is empty"
+    return validate_image_size(w, h, max_size)
+
+
+def validate_image_size(
+    width: int,
+    height: int,
+    max_size: int = 4096
+) -> Tuple[bool, str]:
+    """
+    Validate image width and height are within acceptable limits.
     
-    if w > max_size or h > max_size:
-        return False, f"Image too large: {w}x{h} (max: {max_size}x{max_size})"
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        max_size: Maximum dimension (width or height)
         
-    if w < 100 or h < 100:
-        return False, f"Image too small: {w}x{h} (min: 100x100)"
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    if width > max_size or height > max_size:
+        return False, f"Image too large: {width}x{height} (max: {max_size}x{max_size})"
+        
+    if width < 100 or height < 100:
+        return False, f"Image too small: {width}x{height} (min: 100x100)"
         
     return True, ""
 
@@ -118,9 +347,17 @@ def resize_if_needed(
     scale = max_size / max(w, h)
     new_w = int(w * scale)
     new_h = int(h * scale)
-    
+
+    # Halve with pyrDown until within 2x of the target; INTER_AREA over
+    # large windows is much slower than the fixed 5-tap pyramid kernel
+    resized = image
+    remaining = scale
+    while remaining < 0.5:
+        resized = cv2.pyrDown(resized)
+        remaining *= 2
+
     resized = cv2.resize(
-        image, 
+        resized, 
         (new_w, new_h), 
         interpolation=cv2.INTER_AREA
     )
@@ -128,10 +365,23 @@ def resize_if_needed(
     return resized, scale
 
 
+# Room label font settings
+_LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_LABEL_FONT_SCALE = 0.7
+_LABEL_THICKNESS = 2
+
+
+@functools.lru_cache(maxsize=1024)
+def _label_size(text: str) -> Tuple[Tuple[int, int], int]:
+    """Cached cv2.getTextSize for a room label."""
+    return cv2.getTextSize(text, _LABEL_FONT, _LABEL_FONT_SCALE, _LABEL_THICKNESS)
+
+
 def draw_rooms_on_image(
     image: np.ndarray,
     rooms: list,
-    colors: Optional[List[Tuple[int, int, int]]] = None
+    colors: Optional[List[Tuple[int, int, int]]] = None,
+    inplace: bool = False
 ) -> np.ndarray:
     """
     Draw detected rooms on image for visualization.
@@ -140,11 +390,13 @@ def draw_rooms_on_image(
         image: Original image
         rooms: List of Room objects
         colors: Optional list of BGR colors for each room
+        inplace: Draw directly on image instead of a copy; for callers
+            that don't need the original afterwards
         
     Returns:
-        Image with rooms drawn
+        Image with rooms drawn (image itself when inplace)
     """
-    overlay = image.copy()
+    overlay = image if inplace else image.copy()
     
     if colors is None:
         # Generate distinct colors
@@ -157,52 +409,71 @@ def draw_rooms_on_image(
             (0, 255, 255),  # Yellow
         ]
     
-    # First pass: draw all filled polygons with proper alpha blending
-    for i, room in enumerate(rooms):
-        color = colors[i % len(colors)]
-        points = np.array(room.polygon_vertices, dtype=np.int32)
+    # Rooms carry their vertices pre-converted to OpenCV contours
+    room_points = [room.vertices_array for room in rooms]
+    # Resolve each room's color once for all passes
+    room_colors = [tuple(colors[i % len(colors)]) for i in range(len(rooms))]
+
+    # First pass: rasterize every fill into one color layer plus a mask,
+    # then blend it in a single pass instead of one full-image copy and
+    # blend per room. Work only inside the rooms' joint bounding box.
+    if rooms:
+        height, width = image.shape[:2]
+        x, y, w, h = cv2.boundingRect(np.concatenate(room_points))
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, width), min(y + h, height)
 
-        # Create a temporary layer for this room's fill
-        temp_layer = image.copy()
-        cv2.fillPoly(temp_layer, [points], color)
+        if x1 > x0 and y1 > y0:
+            roi = (slice(y0, y1), slice(x0, x1))
+            color_layer = np.zeros_like(image[roi])
+            fill_mask = np.zeros(color_layer.shape[:2], dtype=np.uint8)
+            for points, color in zip(room_points, room_colors):
+                cv2.fillPoly(color_layer, [points], color, offset=(-x0, -y0))
+                cv2.fillPoly(fill_mask, [points], 255, offset=(-x0, -y0))
 
-        # Blend only 10% of the colored fill to keep background bright
-        cv2.addWeighted(temp_layer, 0.1, overlay, 0.9, 0, overlay)
+            # Blend only 10% of the colored fill to keep background bright,
+            # then copy the blend through the mask in one fused call
+            blended = cv2.addWeighted(image[roi], 0.9, color_layer, 0.1, 0)
+            cv2.copyTo(blended, fill_mask, overlay[roi])
 
-    # Second pass: draw polygon outlines (no transparency)
-    for i, room in enumerate(rooms):
-        color = colors[i % len(colors)]
-        points = np.array(room.polygon_vertices, dtype=np.int32)
-        cv2.polylines(overlay, [points], True, color, 4)
+    # Second pass: draw polygon outlines (no transparency), one polylines
+    # call per color. Fills above stay one call per room: with several
+    # polygons fillPoly uses even-odd filling and would punch holes
+    # where rooms overlap.
+    outlines_by_color = {}
+    for points, color in zip(room_points, room_colors):
+        outlines_by_color.setdefault(color, []).append(points)
+    for color, outlines in outlines_by_color.items():
+        cv2.polylines(overlay, outlines, True, color, 4)
 
     # Third pass: draw room labels with background
-    for i, room in enumerate(rooms):
-        color = colors[i % len(colors)]
+    for room in rooms:
         cx, cy = room.centroid
 
         # Draw black background rectangle for text
         text = room.id
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        font_scale = 0.7
-        thickness = 2
-        (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+        (text_width, text_height), baseline = _label_size(text)
 
         # Draw semi-transparent background
         x1 = cx - text_width // 2 - 5
         y1 = cy - text_height // 2 - 5
         x2 = cx + text_width // 2 + 5
         y2 = cy + text_height // 2 + 5
-        cv2.rectangle(overlay, (x1, y1), (x2, y2), (0, 0, 0), -1)
+        # Filled rectangle as a direct slice write (inclusive). Clip to the
+        # image like cv2.rectangle: negative slice bounds would count from
+        # the far edge, so clamp starts and skip labels ending before it.
+        if x2 >= 0 and y2 >= 0:
+            overlay[max(y1, 0):y2 + 1, max(x1, 0):x2 + 1] = 0
 
         # Draw text
         cv2.putText(
             overlay,
             text,
             (cx - text_width // 2, cy + text_height // 2),
-            font,
-            font_scale,
+            _LABEL_FONT,
+            _LABEL_FONT_SCALE,
             (255, 255, 255),
-            thickness
+            _LABEL_THICKNESS
         )
     
     return overlay
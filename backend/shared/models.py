@@ -3,7 +3,8 @@ Shared Pydantic models for request/response validation.
 Used by all Lambda functions to ensure consistent API contracts.
 """
 from typing import List, Tuple, Optional, Literal
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
 
 class BoundingBox(BaseModel):
@@ -30,6 +31,46 @@ class Room(BaseModel):
     shape_type: Literal["rectangle", "l_shape", "complex"]
     num_vertices: int
 
+    # polygon_vertices as OpenCV contour, converted once per room, and
+    # the list it was converted from (model_copy/assignment replace it)
+    _vertices_array: Optional[np.ndarray] = PrivateAttr(default=None)
+    _vertices_source: Optional[list] = PrivateAttr(default=None)
+
+    @model_validator(mode="after")
+    def _convert_vertices(self) -> "Room":
+        """Convert polygon_vertices to an int32 contour at construction"""
+        self._vertices_array = np.asarray(
+            self.polygon_vertices,
+            dtype=np.int32
+        ).reshape(-1, 1, 2)
+        self._vertices_source = self.polygon_vertices
+        return self
+
+    @property
+    def vertices_array(self) -> np.ndarray:
+        """
+        polygon_vertices as an (N, 1, 2) int32 array, the contour layout
+        cv2.fillPoly and cv2.polylines expect.
+        """
+        if self._vertices_source is not self.polygon_vertices:
+            # model_construct() skips validators, and model_copy(update=...)
+            # or assignment bring in a new vertex list
+            self._convert_vertices()
+        return self._vertices_array
+
+    def __eq__(self, other: object) -> bool:
+        """
+        Compare field values only. BaseModel also compares private
+        attributes, which fails on the (derived) vertex array.
+        """
+        if not isinstance(other, BaseModel):
+            return NotImplemented
+        return (
+            type(self) is type(other)
+            and self.__dict__ == other.__dict__
+            and self.__pydantic_extra__ == other.__pydantic_extra__
+        )
+
 
 class DetectionRequest(BaseModel):
     """
@@ -0,0 +1,52 @@
+"""
+Pytest configuration and shared fixtures for shared utility tests.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from typing import List
+from pydantic import TypeAdapter
+
+# Make the shared package importable as `shared`, once per session
+BACKEND_DIR = str(Path(__file__).resolve().parent.parent.parent)
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from shared.models import BoundingBox, Room, Wall
+
+# One compiled validator for whole room lists
+_ROOM_LIST_ADAPTER = TypeAdapter(List[Room])
+
+
+@pytest.fixture(scope="session")
+def valid_bbox():
+    """Validated bounding box, shared read-only across tests"""
+    return BoundingBox(x_min=0, y_min=0, x_max=100, y_max=100)
+
+
+@pytest.fixture(scope="session")
+def valid_room(valid_bbox):
+    """Validated room, shared read-only across tests"""
+    return Room(
+        id="room_001",
+        polygon_vertices=[(0, 0), (100, 0), (100, 100), (0, 100)],
+        bounding_box=valid_bbox,
+        area_pixels=10000,
+        centroid=(50, 50),
+        confidence=0.95,
+        shape_type="rectangle",
+        num_vertices=4
+    )
+
+
+@pytest.fixture(scope="session")
+def valid_wall():
+    """Validated wall, shared read-only across tests"""
+    return Wall(id="wall_001", bounding_box=(0, 0, 100, 200), confidence=0.85)
+
+
+@pytest.fixture(scope="session")
+def build_rooms():
+    """Validate a list of room dicts into Rooms in a single call"""
+    return _ROOM_LIST_ADAPTER.validate_python
@@ -9,17 +9,14 @@ import base64
 from io import BytesIO
 from PIL import Image
 
-# Import utilities
-import sys
-from pathlib import Path
-
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from shared.image_utils import (
     decode_base64_image,
+    decode_image_bytes,
+    decode_image_bytes_reduced,
+    read_image_size,
     encode_image_to_base64,
     validate_image_dimensions,
+    validate_image_size,
     resize_if_needed,
     draw_rooms_on_image,
 )
@@ -60,12 +57,138 @@ class TestDecodeBase64Image:
         assert decoded is not None
         assert decoded.shape == (50, 50, 3)
     
+    def test_decode_rgba_png_drops_alpha(self):
+        """Test 4-channel PNGs decode to the same BGR pixels without alpha"""
+        bgra = np.zeros((60, 80, 4), dtype=np.uint8)
+        bgra[..., 0] = 255  # Blue
+        bgra[..., 3] = 128
+        success, buffer = cv2.imencode('.png', bgra)
+        
+        decoded = decode_base64_image(base64.b64encode(buffer).decode('utf-8'))
+        
+        assert decoded.shape == (60, 80, 3)
+        assert np.array_equal(decoded, bgra[..., :3])
+    
+    def test_decode_gif_falls_back_to_pil(self):
+        """Test formats OpenCV can't read (GIF) still decode to BGR"""
+        buffer = BytesIO()
+        Image.new('RGB', (50, 40), (255, 0, 0)).save(buffer, 'GIF')
+        
+        decoded = decode_base64_image(base64.b64encode(buffer.getvalue()).decode('utf-8'))
+        
+        assert decoded.shape == (40, 50, 3)
+        assert tuple(decoded[0, 0]) == (0, 0, 255)  # Red in BGR
+    
+    def test_decode_base64_without_padding(self):
+        """Test base64 with stripped '=' padding still decodes"""
+        img = np.zeros((50, 51, 3), dtype=np.uint8)
+        success, buffer = cv2.imencode('.png', img)
+        img_base64 = base64.b64encode(buffer).decode('utf-8')
+        assert img_base64.endswith('=')
+        
+        decoded = decode_base64_image(img_base64.rstrip('='))
+        
+        assert decoded.shape == (50, 51, 3)
+    
+    def test_decode_rejects_oversize_payload_before_decoding(self, monkeypatch):
+        """Test payloads over MAX_ENCODED_BYTES are rejected from their length"""
+        import shared.image_utils as image_utils
+        monkeypatch.setattr(image_utils, 'MAX_ENCODED_BYTES', 1000)
+        
+        with pytest.raises(ValueError, match="too large"):
+            decode_base64_image("A" * 2000)
+    
     def test_decode_invalid_base64(self):
         """Test decoding invalid base64 raises error"""
         with pytest.raises(ValueError):
             decode_base64_image("invalid_base64_string!!!")
 
 
+class TestDecodeImageBytes:
+    """Tests for decode_image_bytes function"""
+    
+    def test_decode_png_bytes(self):
+        """Test decoding raw PNG bytes"""
+        img = np.zeros((100, 120, 3), dtype=np.uint8)
+        img[10:20, 10:20] = (255, 0, 0)
+        success, buffer = cv2.imencode('.png', img)
+        
+        decoded = decode_image_bytes(buffer.tobytes())
+        
+        assert decoded.shape == (100, 120, 3)
+        assert np.array_equal(decoded, img)
+    
+    @pytest.mark.parametrize("data", [b"", b"not an image"])
+    def test_decode_invalid_bytes(self, data):
+        """Test decoding empty or corrupt bytes raises ValueError"""
+        with pytest.raises(ValueError, match="Failed to decode"):
+            decode_image_bytes(data)
+
+
+class TestReadImageSize:
+    """Tests for read_image_size function"""
+    
+    def test_read_size_from_header(self):
+        """Test dimensions come back as (width, height)"""
+        img = np.zeros((300, 500, 3), dtype=np.uint8)
+        success, buffer = cv2.imencode('.png', img)
+        
+        assert read_image_size(buffer.tobytes()) == (500, 300)
+    
+    def test_read_size_invalid_bytes(self):
+        """Test unrecognizable bytes raise ValueError"""
+        with pytest.raises(ValueError, match="Failed to decode"):
+            read_image_size(b"not an image")
+
+
+class TestDecodeImageBytesReduced:
+    """Tests for decode_image_bytes_reduced function"""
+    
+    @pytest.mark.parametrize("size,expected_long_side", [
+        (4096, 1024),  # 1/4 keeps >= 640, 1/8 (512) would not
+        (1500, 750),   # 1/2
+        (1000, 1000),  # any reduction drops below 640
+    ])
+    def test_reduction_keeps_min_long_side(self, size, expected_long_side):
+        """Test the largest reduction that keeps the long side >= min is used"""
+        img = np.full((size // 2, size, 3), 200, dtype=np.uint8)
+        success, buffer = cv2.imencode('.jpg', img)
+        
+        decoded, original_size = decode_image_bytes_reduced(buffer.tobytes(), 640)
+        
+        assert original_size == (size, size // 2)
+        assert decoded.shape[1] == expected_long_side
+        assert decoded.shape[2] == 3
+    
+    def test_exif_orientation_is_ignored(self):
+        """Test EXIF-rotated JPEGs decode in stored orientation, matching the header size"""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Rotate 90 CW on display
+        buffer = BytesIO()
+        Image.new('RGB', (1600, 800), (200, 200, 200)).save(buffer, 'JPEG', exif=exif)
+        
+        decoded, original_size = decode_image_bytes_reduced(buffer.getvalue(), 640)
+        
+        assert original_size == (1600, 800)
+        assert decoded.shape[:2] == (400, 800)
+    
+    def test_decode_invalid_bytes(self):
+        """Test decoding corrupt bytes raises ValueError"""
+        with pytest.raises(ValueError, match="Failed to decode"):
+            decode_image_bytes_reduced(b"not an image", 640)
+    
+    def test_decode_gif_falls_back_to_full_size(self):
+        """Test formats OpenCV can't read decode at full size via PIL"""
+        buffer = BytesIO()
+        Image.new('RGB', (1600, 800), (0, 0, 255)).save(buffer, 'GIF')
+        
+        decoded, original_size = decode_image_bytes_reduced(buffer.getvalue(), 640)
+        
+        assert original_size == (1600, 800)
+        assert decoded.shape == (800, 1600, 3)
+        assert tuple(decoded[0, 0]) == (255, 0, 0)
+
+
 class TestEncodeImageToBase64:
     """Tests for encode_image_to_base64 function"""
     
@@ -93,6 +216,29 @@ class TestEncodeImageToBase64:
         
         assert encoded is not None
         assert isinstance(encoded, str)
+
+    def test_encode_image_to_base64_jpg_is_baseline(self):
+        """Test JPEG output is baseline (SOF0), not progressive"""
+        img = np.full((64, 64, 3), 128, dtype=np.uint8)
+
+        data = base64.b64decode(encode_image_to_base64(img, format="jpg"))
+
+        assert data[:2] == b"\xff\xd8"
+        assert b"\xff\xc0" in data
+        assert b"\xff\xc2" not in data
+    
+    def test_encode_image_to_base64_palette(self):
+        """Test palette PNG round-trips a few-color image exactly, smaller"""
+        img = np.full((200, 200, 3), 255, dtype=np.uint8)
+        img[20:100, 20:100] = (230, 200, 200)
+        img[120:180, 50:150] = (0, 0, 0)
+        
+        encoded = encode_image_to_base64(img, format="png", palette=True)
+        
+        data = base64.b64decode(encoded)
+        decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        assert np.array_equal(decoded, img)
+        assert len(encoded) < len(encode_image_to_base64(img, format="png"))
     
     def test_encode_invalid_format(self):
         """Test encoding with invalid format raises error"""
@@ -129,6 +275,12 @@ class TestValidateImageDimensions:
         assert is_valid == False
         assert "too small" in error_msg.lower()
     
+    def test_validate_image_size_from_dimensions(self):
+        """Test validating width/height without an image array"""
+        assert validate_image_size(500, 400) == (True, "")
+        assert not validate_image_size(5000, 400)[0]
+        assert "too small" in validate_image_size(50, 400)[1]
+    
     def test_validate_empty_image(self):
         """Test validating empty image"""
         img = np.array([])
@@ -136,6 +288,14 @@ class TestValidateImageDimensions:
         
         assert is_valid == False
         assert "empty" in error_msg.lower()
+    
+    def test_validate_zero_height_image(self):
+        """Test validating image with a zero-length axis"""
+        img = np.zeros((0, 500, 3), dtype=np.uint8)
+        is_valid, error_msg = validate_image_dimensions(img)
+        
+        assert is_valid == False
+        assert "empty" in error_msg.lower()
 
 
 class TestResizeIfNeeded:
@@ -177,97 +337,156 @@ class TestResizeIfNeeded:
         # Aspect ratio should be maintained (within floating point error)
         assert abs(original_ratio - resized_ratio) < 0.01
 
+    def test_resize_large_downscale_exact_size(self):
+        """Test multi-step downscale lands on the same size as a one-shot resize"""
+        img = np.full((4100, 5000, 3), 128, dtype=np.uint8)
+
+        resized, scale = resize_if_needed(img, max_size=1024)
+
+        assert scale == 1024 / 5000
+        assert resized.shape == (int(4100 * scale), int(5000 * scale), 3)
+        assert np.all(resized == 128)
+
 
 class TestDrawRoomsOnImage:
     """Tests for draw_rooms_on_image function"""
     
-    def test_draw_rooms_on_image(self):
+    def test_draw_rooms_on_image(self, valid_room):
         """Test drawing rooms on image"""
         # Create test image
         img = np.zeros((500, 500, 3), dtype=np.uint8)
         img.fill(255)  # White background
         
-        # Create test room (using Room model)
-        from shared.models import Room, BoundingBox
-        
-        bbox = BoundingBox(x_min=50, y_min=50, x_max=150, y_max=150)
-        room = Room(
-            id="room_001",
-            polygon_vertices=[(50, 50), (150, 50), (150, 150), (50, 150)],
-            bounding_box=bbox,
-            area_pixels=10000,
-            centroid=(100, 100),
-            confidence=0.9,
-            shape_type="rectangle",
-            num_vertices=4
-        )
-        
         # Draw rooms
-        result = draw_rooms_on_image(img, [room])
+        result = draw_rooms_on_image(img, [valid_room])
         
         assert result is not None
         assert result.shape == img.shape
         # Image should be modified (not identical)
         assert not np.array_equal(result, img)
     
-    def test_draw_multiple_rooms(self):
+    def test_draw_multiple_rooms(self, build_rooms):
         """Test drawing multiple rooms"""
         img = np.zeros((500, 500, 3), dtype=np.uint8)
         img.fill(255)
         
-        from shared.models import Room, BoundingBox
-        
-        rooms = []
-        for i in range(3):
-            bbox = BoundingBox(
-                x_min=50 + i*100,
-                y_min=50 + i*100,
-                x_max=150 + i*100,
-                y_max=150 + i*100
-            )
-            room = Room(
-                id=f"room_{i+1:03d}",
-                polygon_vertices=[
+        rooms = build_rooms([
+            {
+                "id": f"room_{i+1:03d}",
+                "polygon_vertices": [
                     (50 + i*100, 50 + i*100),
                     (150 + i*100, 50 + i*100),
                     (150 + i*100, 150 + i*100),
                     (50 + i*100, 150 + i*100)
                 ],
-                bounding_box=bbox,
-                area_pixels=10000,
-                centroid=(100 + i*100, 100 + i*100),
-                confidence=0.9,
-                shape_type="rectangle",
-                num_vertices=4
-            )
-            rooms.append(room)
+                "bounding_box": {
+                    "x_min": 50 + i*100,
+                    "y_min": 50 + i*100,
+                    "x_max": 150 + i*100,
+                    "y_max": 150 + i*100
+                },
+                "area_pixels": 10000,
+                "centroid": (100 + i*100, 100 + i*100),
+                "confidence": 0.9,
+                "shape_type": "rectangle",
+                "num_vertices": 4
+            }
+            for i in range(3)
+        ])
         
         result = draw_rooms_on_image(img, rooms)
         
         assert result is not None
         assert result.shape == img.shape
     
-    def test_draw_rooms_with_custom_colors(self):
+    def test_draw_rooms_with_custom_colors(self, valid_room):
         """Test drawing rooms with custom colors"""
         img = np.zeros((500, 500, 3), dtype=np.uint8)
         img.fill(255)
         
-        from shared.models import Room, BoundingBox
-        
-        bbox = BoundingBox(x_min=50, y_min=50, x_max=150, y_max=150)
-        room = Room(
-            id="room_001",
-            polygon_vertices=[(50, 50), (150, 50), (150, 150), (50, 150)],
-            bounding_box=bbox,
-            area_pixels=10000,
-            centroid=(100, 100),
-            confidence=0.9,
-            shape_type="rectangle",
-            num_vertices=4
-        )
-        
         custom_colors = [(255, 0, 0)]  # Blue
-        result = draw_rooms_on_image(img, [room], colors=custom_colors)
+        result = draw_rooms_on_image(img, [valid_room], colors=custom_colors)
         
         assert result is not None
 
+    
+    def test_draw_rooms_tints_every_room_equally(self, build_rooms):
+        """Test each room's fill is a 10% tint, however many rooms follow it"""
+        img = np.full((500, 500, 3), 200, dtype=np.uint8)
+        
+        rooms = build_rooms([
+            {
+                "id": f"room_{i+1:03d}",
+                "polygon_vertices": [(x, 20), (x + 140, 20), (x + 140, 160), (x, 160)],
+                "bounding_box": {"x_min": x, "y_min": 20, "x_max": x + 140, "y_max": 160},
+                "area_pixels": 19600,
+                "centroid": (x + 70, 90),
+                "confidence": 0.9,
+                "shape_type": "rectangle",
+                "num_vertices": 4
+            }
+            for i, x in enumerate(range(20, 500, 160))
+        ])
+        
+        colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+        result = draw_rooms_on_image(img, rooms, colors=colors)
+        
+        for i, color in enumerate(colors):
+            x = 20 + i * 160
+            expected = np.round(0.9 * 200 + 0.1 * np.array(color))
+            assert np.array_equal(result[40, x + 10], expected)
+        # Outside every room the image is untouched
+        assert np.array_equal(result[300, 300], img[300, 300])
+
+    @pytest.mark.parametrize("centroid", [
+        (150, -40),   # Label fully above the image
+        (-80, 100),   # Label fully left of the image
+        (0, 100),     # Label straddling the left edge
+        (150, 0),     # Label straddling the top edge
+    ])
+    def test_draw_rooms_label_off_image_is_clipped(self, build_rooms, centroid):
+        """Test label backgrounds off the image edge are clipped, not wrapped"""
+        img = np.full((300, 300, 3), 255, dtype=np.uint8)
+        rooms = build_rooms([{
+            "id": "room_001",
+            "polygon_vertices": [(200, 200), (250, 200), (250, 250), (200, 250)],
+            "bounding_box": {"x_min": 200, "y_min": 200, "x_max": 250, "y_max": 250},
+            "area_pixels": 2500,
+            "centroid": centroid,
+            "confidence": 0.9,
+            "shape_type": "rectangle",
+            "num_vertices": 4
+        }])
+        
+        result = draw_rooms_on_image(img, rooms)
+        
+        # Reference: the same label background drawn by cv2.rectangle
+        (text_width, text_height), _ = cv2.getTextSize(
+            "room_001", cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2
+        )
+        cx, cy = centroid
+        label = np.zeros((300, 300), dtype=np.uint8)
+        cv2.rectangle(
+            label,
+            (cx - text_width // 2 - 5, cy - text_height // 2 - 5),
+            (cx + text_width // 2 + 5, cy + text_height // 2 + 5),
+            255,
+            -1
+        )
+        
+        # Away from the room, only pixels inside the clipped label change
+        changed = np.any(result != 255, axis=2)
+        changed[190:260, 190:260] = False
+        assert not np.any(changed & (label == 0))
+    
+    def test_draw_rooms_inplace(self, valid_room):
+        """Test inplace drawing modifies the input and matches a copy draw"""
+        img = np.full((300, 300, 3), 255, dtype=np.uint8)
+        
+        expected = draw_rooms_on_image(img, [valid_room])
+        assert np.all(img == 255)
+        
+        result = draw_rooms_on_image(img, [valid_room], inplace=True)
+        
+        assert result is img
+        assert np.array_equal(result, expected)
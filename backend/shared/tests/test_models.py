@@ -2,17 +2,13 @@
 Unit tests for shared Pydantic models.
 Tests validation, serialization, and model behavior.
 """
+import hashlib
+import json
 import pytest
+import numpy as np
 from typing import List, Tuple
 from pydantic import ValidationError
 
-# Import models
-import sys
-from pathlib import Path
-
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from shared.models import (
     BoundingBox,
     Room,
@@ -26,6 +22,26 @@ from shared.models import (
 )
 
 
+# 100x100 square room outline, shared read-only by the Room tests
+_UNIT_SQUARE = ((0, 0), (100, 0), (100, 100), (0, 100))
+
+
+def _room_fields(bbox, **overrides):
+    """Keyword arguments for a valid Room, with overrides applied"""
+    fields = dict(
+        id="room_001",
+        polygon_vertices=_UNIT_SQUARE,
+        bounding_box=bbox,
+        area_pixels=10000,
+        centroid=(50, 50),
+        confidence=0.9,
+        shape_type="rectangle",
+        num_vertices=4
+    )
+    fields.update(overrides)
+    return fields
+
+
 class TestBoundingBox:
     """Tests for BoundingBox model"""
     
@@ -43,195 +59,178 @@ class TestBoundingBox:
         data = bbox.model_dump()
         assert data["x_min"] == 10
         assert data["y_max"] == 120
+        assert json.loads(bbox.model_dump_json()) == data
+    
+    @pytest.mark.parametrize("mode", ["python", "json"])
+    def test_bounding_box_dump_modes(self, mode):
+        """Test python and json dump modes produce the same content"""
+        bbox = BoundingBox(x_min=10, y_min=20, x_max=110, y_max=120)
+        data = bbox.model_dump(mode=mode)
+        assert data == {"x_min": 10, "y_min": 20, "x_max": 110, "y_max": 120}
+        assert all(type(value) is int for value in data.values())
 
 
 class TestRoom:
     """Tests for Room model"""
     
-    def test_valid_room(self):
+    def test_valid_room(self, valid_bbox):
         """Test creating valid room"""
-        bbox = BoundingBox(x_min=0, y_min=0, x_max=100, y_max=100)
-        room = Room(
-            id="room_001",
-            polygon_vertices=[(0, 0), (100, 0), (100, 100), (0, 100)],
-            bounding_box=bbox,
-            area_pixels=10000,
-            centroid=(50, 50),
-            confidence=0.95,
-            shape_type="rectangle",
-            num_vertices=4
-        )
+        room = Room(**_room_fields(valid_bbox, confidence=0.95))
         assert room.id == "room_001"
-        assert len(room.polygon_vertices) == 4
+        assert room.polygon_vertices == list(_UNIT_SQUARE)
         assert room.confidence == 0.95
         assert room.shape_type == "rectangle"
     
-    def test_room_confidence_validation(self):
-        """Test room confidence must be between 0 and 1"""
-        bbox = BoundingBox(x_min=0, y_min=0, x_max=100, y_max=100)
-        
-        # Valid confidence
-        room = Room(
+    @pytest.mark.parametrize("confidence", [0.0, 0.5, 1.0])
+    def test_room_confidence_valid(self, valid_bbox, confidence):
+        """Test room confidence accepts values between 0 and 1"""
+        room = Room(**_room_fields(valid_bbox, confidence=confidence))
+        assert room.confidence == confidence
+    
+    @pytest.mark.parametrize("confidence", [1.5, -0.1, 2.0, -1.0])
+    def test_room_confidence_invalid(self, valid_bbox, confidence):
+        """Test room confidence outside 0-1 is rejected"""
+        with pytest.raises(ValidationError, match=r"(?m)^confidence$"):
+            Room(**_room_fields(valid_bbox, confidence=confidence))
+    
+    @pytest.mark.parametrize("shape_type", ["rectangle", "l_shape", "complex"])
+    def test_room_shape_type_valid(self, valid_bbox, shape_type):
+        """Test room shape_type accepts each valid literal"""
+        room = Room(**_room_fields(valid_bbox, shape_type=shape_type))
+        assert room.shape_type == shape_type
+    
+    def test_room_shape_type_invalid(self, valid_bbox):
+        """Test room shape_type must be valid literal"""
+        with pytest.raises(ValidationError, match=r"(?m)^shape_type$"):
+            Room(**_room_fields(valid_bbox, shape_type="invalid"))
+    
+    def test_room_vertices_array(self):
+        """Test vertices are pre-converted to an OpenCV int32 contour"""
+        bbox = BoundingBox(x_min=0, y_min=0, x_max=100, y_max=50)
+        fields = dict(
             id="room_001",
-            polygon_vertices=[(0, 0), (100, 0), (100, 100), (0, 100)],
+            polygon_vertices=[(0, 0), (100, 0), (100, 50), (0, 50)],
             bounding_box=bbox,
-            area_pixels=10000,
-            centroid=(50, 50),
-            confidence=0.5,
+            area_pixels=5000,
+            centroid=(50, 25),
+            confidence=0.9,
             shape_type="rectangle",
             num_vertices=4
         )
-        assert room.confidence == 0.5
-        
-        # Invalid confidence (too high)
-        with pytest.raises(ValidationError):
-            Room(
-                id="room_001",
-                polygon_vertices=[(0, 0), (100, 0), (100, 100), (0, 100)],
-                bounding_box=bbox,
-                area_pixels=10000,
-                centroid=(50, 50),
-                confidence=1.5,  # Invalid
-                shape_type="rectangle",
-                num_vertices=4
-            )
+        room = Room(**fields)
         
-        # Invalid confidence (negative)
-        with pytest.raises(ValidationError):
-            Room(
-                id="room_001",
-                polygon_vertices=[(0, 0), (100, 0), (100, 100), (0, 100)],
-                bounding_box=bbox,
-                area_pixels=10000,
-                centroid=(50, 50),
-                confidence=-0.1,  # Invalid
-                shape_type="rectangle",
-                num_vertices=4
-            )
-    
-    def test_room_shape_type_validation(self):
-        """Test room shape_type must be valid literal"""
-        bbox = BoundingBox(x_min=0, y_min=0, x_max=100, y_max=100)
+        assert room.vertices_array.shape == (4, 1, 2)
+        assert room.vertices_array.dtype == np.int32
+        assert room.vertices_array[2, 0].tolist() == [100, 50]
+        # model_construct skips validators; the array is built on demand
+        assert Room.model_construct(**fields).vertices_array.shape == (4, 1, 2)
+        # The cached array doesn't take part in equality or serialization
+        assert room == Room(**fields)
+        assert "_vertices_array" not in room.model_dump()
+        # Copies with new vertices don't reuse the cached array
+        moved = room.model_copy(update={"polygon_vertices": [(1, 1), (9, 1), (9, 9)]})
+        assert moved.vertices_array.shape == (3, 1, 2)
+        assert room.vertices_array.shape == (4, 1, 2)
+
+
+    def test_room_schema_not_rebuilt(self, valid_bbox):
+        """Test building and copying rooms reuses the compiled validator"""
+        validator = Room.__pydantic_validator__
         
-        # Valid shape types
-        for shape_type in ["rectangle", "l_shape", "complex"]:
-            room = Room(
-                id="room_001",
-                polygon_vertices=[(0, 0), (100, 0), (100, 100), (0, 100)],
-                bounding_box=bbox,
-                area_pixels=10000,
-                centroid=(50, 50),
-                confidence=0.9,
-                shape_type=shape_type,
-                num_vertices=4
-            )
-            assert room.shape_type == shape_type
+        room = Room(**_room_fields(valid_bbox))
+        room.model_copy(update={"polygon_vertices": [(0, 0), (5, 0), (5, 5)]})
+        Room.model_construct(**_room_fields(valid_bbox)).vertices_array
         
-        # Invalid shape type
-        with pytest.raises(ValidationError):
-            Room(
-                id="room_001",
-                polygon_vertices=[(0, 0), (100, 0), (100, 100), (0, 100)],
-                bounding_box=bbox,
-                area_pixels=10000,
-                centroid=(50, 50),
-                confidence=0.9,
-                shape_type="invalid",  # Invalid
-                num_vertices=4
-            )
+        assert Room.__pydantic_complete__
+        assert Room.__pydantic_validator__ is validator
 
 
 class TestDetectionRequest:
     """Tests for DetectionRequest model"""
     
-    def test_valid_detection_request_v1(self):
-        """Test creating valid detection request for v1"""
+    @pytest.mark.parametrize("version,overrides,expected", [
+        ("v1", {}, (0.10, 2000, False)),  # Defaults
+        (
+            "v2",
+            {"confidence_threshold": 0.15, "min_room_area": 3000, "enable_refinement": True},
+            (0.15, 3000, True)
+        ),
+    ], ids=["v1-defaults", "v2-overrides"])
+    def test_valid_detection_request(self, version, overrides, expected):
+        """Test creating valid detection requests for v1 and v2"""
         request = DetectionRequest(
             image="base64encodedstring",
-            version="v1"
+            version=version,
+            **overrides
         )
+        confidence_threshold, min_room_area, enable_refinement = expected
         assert request.image == "base64encodedstring"
-        assert request.version == "v1"
-        assert request.confidence_threshold == 0.10  # Default
-        assert request.min_room_area == 2000  # Default
-        assert request.return_visualization == True  # Default
+        assert request.version == version
+        assert request.confidence_threshold == confidence_threshold
+        assert request.min_room_area == min_room_area
+        assert request.enable_refinement == enable_refinement
+        assert request.return_visualization is True  # Default
     
-    def test_valid_detection_request_v2(self):
-        """Test creating valid detection request for v2"""
-        request = DetectionRequest(
-            image="base64encodedstring",
+    @pytest.mark.parametrize("confidence", [0.0, 0.5, 1.0])
+    def test_detection_request_confidence_valid(self, confidence):
+        """Test confidence threshold accepts values between 0 and 1"""
+        request = DetectionRequest(image="base64", confidence_threshold=confidence)
+        assert request.confidence_threshold == confidence
+    
+    @pytest.mark.parametrize("confidence", [1.5, -0.1])
+    def test_detection_request_confidence_invalid(self, confidence):
+        """Test confidence threshold outside 0-1 is rejected"""
+        with pytest.raises(ValidationError, match=r"(?m)^confidence_threshold$"):
+            DetectionRequest(image="base64", confidence_threshold=confidence)
+    
+    @pytest.mark.parametrize("version", ["v1", "v2"])
+    def test_detection_request_version_valid(self, version):
+        """Test version accepts v1 and v2"""
+        request = DetectionRequest(image="base64", version=version)
+        assert request.version == version
+    
+    def test_detection_request_deterministic_dump(self):
+        """Test equal requests dump to byte-identical, hashable cache keys"""
+        first = DetectionRequest(
+            image="base64",
             version="v2",
             confidence_threshold=0.15,
-            min_room_area=3000,
-            enable_refinement=True
+            min_room_area=3000
         )
-        assert request.version == "v2"
-        assert request.confidence_threshold == 0.15
-        assert request.min_room_area == 3000
-        assert request.enable_refinement == True
-    
-    def test_detection_request_confidence_validation(self):
-        """Test confidence threshold validation"""
-        # Valid confidence
-        request = DetectionRequest(
-            image="base64",
-            confidence_threshold=0.5
+        second = DetectionRequest(
+            min_room_area=3000,
+            confidence_threshold=0.15,
+            version="v2",
+            image="base64"
         )
-        assert request.confidence_threshold == 0.5
         
-        # Invalid confidence (too high)
-        with pytest.raises(ValidationError):
-            DetectionRequest(
-                image="base64",
-                confidence_threshold=1.5  # Invalid
-            )
+        first_key = json.dumps(first.model_dump(mode="json"), sort_keys=True).encode()
+        second_key = json.dumps(second.model_dump(mode="json"), sort_keys=True).encode()
         
-        # Invalid confidence (negative)
-        with pytest.raises(ValidationError):
-            DetectionRequest(
-                image="base64",
-                confidence_threshold=-0.1  # Invalid
-            )
+        assert first_key == second_key
+        assert hashlib.sha256(first_key).digest() == hashlib.sha256(second_key).digest()
     
-    def test_detection_request_version_validation(self):
+    def test_detection_request_version_invalid(self):
         """Test version must be v1 or v2"""
-        # Valid versions
-        for version in ["v1", "v2"]:
-            request = DetectionRequest(image="base64", version=version)
-            assert request.version == version
-        
-        # Invalid version
-        with pytest.raises(ValidationError):
-            DetectionRequest(image="base64", version="v3")  # Invalid
+        with pytest.raises(ValidationError, match=r"(?m)^version$"):
+            DetectionRequest(image="base64", version="v3")
 
 
 class TestDetectionResponse:
     """Tests for DetectionResponse model"""
     
-    def test_valid_detection_response(self):
+    def test_valid_detection_response(self, valid_room):
         """Test creating valid detection response"""
-        bbox = BoundingBox(x_min=0, y_min=0, x_max=100, y_max=100)
-        room = Room(
-            id="room_001",
-            polygon_vertices=[(0, 0), (100, 0), (100, 100), (0, 100)],
-            bounding_box=bbox,
-            area_pixels=10000,
-            centroid=(50, 50),
-            confidence=0.95,
-            shape_type="rectangle",
-            num_vertices=4
-        )
-        
         response = DetectionResponse(
             success=True,
-            rooms=[room],
+            rooms=[valid_room],
             total_rooms=1,
             processing_time_ms=123.45,
             model_version="v1",
             visualization="base64image",
             metadata={"key": "value"}
         )
-        assert response.success == True
+        assert response.success is True
         assert len(response.rooms) == 1
         assert response.total_rooms == 1
         assert response.model_version == "v1"
@@ -247,7 +246,23 @@ class TestDetectionResponse:
             model_version="v2"
         )
         assert response.visualization is None
-        assert response.metadata == {}
+        assert type(response.metadata) is dict
+        assert len(response.metadata) == 0
+    
+    def test_detection_response_metadata_default_factory(self):
+        """Test metadata defaults via default_factory, fresh per response"""
+        assert DetectionResponse.model_fields["metadata"].default_factory is dict
+        
+        fields = dict(
+            success=True,
+            rooms=[],
+            total_rooms=0,
+            processing_time_ms=50.0,
+            model_version="v2"
+        )
+        first = DetectionResponse(**fields)
+        first.metadata["key"] = "value"
+        assert DetectionResponse(**fields).metadata == {}
 
 
 class TestErrorResponse:
@@ -259,7 +274,7 @@ class TestErrorResponse:
             error={"message": "Something went wrong", "code": 500},
             model_version="v1"
         )
-        assert error.success == False  # Default
+        assert error.success is False  # Default
         assert error.error["message"] == "Something went wrong"
         assert error.model_version == "v1"
     
@@ -292,7 +307,7 @@ class TestWall:
         assert wall.confidence == 0.5
         
         # Invalid confidence
-        with pytest.raises(ValidationError):
+        with pytest.raises(ValidationError, match=r"(?m)^confidence$"):
             Wall(id="wall_001", bounding_box=(0, 0, 100, 100), confidence=1.5)
 
 
@@ -313,17 +328,16 @@ class TestWallDetectionRequest:
 class TestWallDetectionResponse:
     """Tests for WallDetectionResponse model"""
     
-    def test_valid_wall_detection_response(self):
+    def test_valid_wall_detection_response(self, valid_wall):
         """Test creating valid wall detection response"""
-        wall = Wall(id="wall_001", bounding_box=(0, 0, 100, 200), confidence=0.85)
         response = WallDetectionResponse(
             success=True,
-            walls=[wall],
+            walls=[valid_wall],
             total_walls=1,
             image_dimensions=(800, 600),
             processing_time_ms=234.56
         )
-        assert response.success == True
+        assert response.success is True
         assert len(response.walls) == 1
         assert response.total_walls == 1
         assert response.image_dimensions == (800, 600)
@@ -332,11 +346,10 @@ class TestWallDetectionResponse:
 class TestGeometricConversionRequest:
     """Tests for GeometricConversionRequest model"""
     
-    def test_valid_geometric_conversion_request(self):
+    def test_valid_geometric_conversion_request(self, valid_wall):
         """Test creating valid geometric conversion request"""
-        wall = Wall(id="wall_001", bounding_box=(0, 0, 100, 200), confidence=0.85)
         request = GeometricConversionRequest(
-            walls=[wall],
+            walls=[valid_wall],
             image_dimensions=(800, 600),
             min_room_area=3000,
             return_visualization=True
@@ -344,5 +357,5 @@ class TestGeometricConversionRequest:
         assert len(request.walls) == 1
         assert request.image_dimensions == (800, 600)
         assert request.min_room_area == 3000
-        assert request.return_visualization == True
+        assert request.return_visualization is True
 